@@ -1,12 +1,42 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, colorchooser, Menu, messagebox
-import sounddevice as sd
+from tkinter import ttk, scrolledtext, colorchooser, Menu, messagebox, filedialog
 import numpy as np
-import queue
 import threading
+import queue
+import collections
+import time
+import re
 import sys 
-from faster_whisper import WhisperModel
-import translators as ts 
+import os
+import argparse
+import glob
+import json
+import concurrent.futures
+import platform
+import bisect
+import dataclasses
+import weakref
+import sqlite3
+import socket
+import struct
+from multiprocessing import shared_memory, resource_tracker
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+try:
+    import sounddevice as sd
+except OSError: # PortAudio is missing (e.g. on servers); only live capture needs it
+    sd = None
+try:
+    import translators as ts
+except Exception: # translators probes the network on import and raises when offline
+    ts = None
+try:
+    import argostranslate.translate as argos_translate # Optional offline translation
+except ImportError:
+    argos_translate = None
+try:
+    from wordfreq import zipf_frequency # Optional: keeps glossary corrections off everyday words
+except ImportError:
+    zipf_frequency = None
 
 # --- New Color Palette ---
 CP_MAIN_BG = "#6E4555"         # Dark Mauve (Main Background)
@@ -24,6 +54,7 @@ SPEAKER_INFO_BG = CP_ACCENT_BG2
 PROGRESS_BAR_TROUGH_COLOR = CP_ACCENT_BG2 
 PROGRESS_BAR_FG_COLOR = CP_MAIN_TEXT # Progress bar fill
 TRANSLATION_TEXT_COLOR = CP_SECONDARY_TEXT 
+PARTIAL_TEXT_COLOR = "#9C8A91"  # Greyed-out unstable text in streaming mode
 
 # Button Colors from Palette
 BTN_START_BG = CP_SECONDARY_TEXT 
@@ -36,44 +67,2781 @@ SETTINGS_ICON_COLOR = CP_MAIN_TEXT
 SWITCH_SPK_BTN_BG = CP_ACCENT_BG1
 SWITCH_SPK_BTN_FG = CP_MAIN_TEXT
 
+# --- Audio capture settings ---
+AUDIO_SAMPLE_RATE = 16000
+AUDIO_RING_CAPACITY_S = 30       # Seconds of audio kept before the oldest unread samples are dropped
+SPEAKER2_INPUT_TOGGLE = "Same input (Spacebar switches speaker)"
+SPEAKER2_INPUT_CHANNEL = "Channel 2 of the selected device"
+
+# --- Level meter settings ---
+LEVEL_METER_RATE_HZ = 20         # Meter redraws per second while listening with the window shown
+LEVEL_METER_WINDOW_S = 0.05      # Newest audio the RMS/peak reading (and spectrum) covers
+LEVEL_METER_FLOOR_DB = -60.0     # Shown as an empty meter
+LEVEL_METER_PEAK_DECAY_DB_S = 20.0 # Held peak falls back this fast
+LEVEL_METER_STRIPS = ["off", "waveform", "spectrum"]
+LEVEL_METER_STRIP = "off"        # Optional strip beside the meter
+LEVEL_STRIP_POINTS = 32          # Bars in the strip
+LEVEL_STRIP_WAVEFORM_S = 1.0     # Audio the waveform strip spans
+LEVEL_STRIP_MIN_HZ = 80.0        # Lowest spectrum band edge
+
+# --- Voice activity segmentation settings ---
+VAD_FRAME_MS = 30
+VAD_SCAN_INTERVAL_S = 0.1        # New audio batched up before each segmenter pass
+VAD_THRESHOLD_DB = -45.0         # A speech frame must be louder than this...
+VAD_NOISE_MARGIN_DB = 10.0       # ...and this far above the tracked background noise level
+VAD_MIN_SPEECH_MS = 150          # Speech shorter than this (clicks, bumps) does not open an utterance
+VAD_MIN_SILENCE_MS = 500         # Silence that closes an utterance
+VAD_PADDING_MS = 200             # Audio kept before and after the detected speech
+VAD_MAX_UTTERANCE_S = 12         # Longer utterances are split at the quietest recent frame
+
+# --- Speaker identification settings ---
+SPEAKER_MAX_CLUSTERS = 6         # Voices told apart before new ones are folded into the nearest
+SPEAKER_MATCH_THRESHOLD = 0.9    # Cosine similarity to an existing voice needed to reuse it
+SPEAKER_CENTROID_MEMORY = 20     # Utterances averaged into a voice; later ones let it drift slowly
+SPEAKER_EMBEDDING_BANDS = 24     # Mel bands behind each voice signature
+SPEAKER_DEFAULT_COLORS = ["#FFB6C1", "#ADD8E6", "#B5E7A0", "#FFD59E", "#D7B9F5", "#9EE7E0"]
+
+# --- Language tracking settings (Auto-Detect) ---
+LANGUAGE_CONFIDENT_PROB = 0.7    # Detections below this probability don't change a speaker's language
+LANGUAGE_SWITCH_DETECTIONS = 2   # Confident detections in a row needed to replace an established language
+LANGUAGE_RECHECK_LOGPROB = -1.0  # Mean segment log-probability below which the language is detected again
+
+# --- Streaming mode settings ---
+STREAMING_STEP_S = 1.0           # Re-decode the sliding window every STEP seconds of new audio
+STREAMING_MAX_WINDOW_S = 15      # Force-commit the hypothesis once the uncommitted window grows this long
+STREAMING_BEAM_SIZE = 1          # Greedy decoding; the window is re-decoded many times
+STREAMING_PROMPT_WORDS = 40      # Committed words passed back to Whisper as context
+STREAMING_MAX_LINE_WORDS = 25    # Emit a caption line at sentence ends or after this many words
+
+# --- Glossary and prompt settings ---
+GLOSSARY_PROMPT_MAX_TOKENS = 150 # Glossary terms in the decoder prompt (Whisper allows 223 prompt tokens)
+PROMPT_MAX_TOKENS = 200          # Glossary plus the rolling context of recent words
+PROMPT_CONTEXT_WORDS = 24        # Recent words of the same input carried into the next prompt (0 disables; profiles that condition on previous text only)
+PROMPT_CACHE_ENTRIES = 4000      # Cached word encodings per model
+GLOSSARY_FUZZY_MIN_CHARS = 7     # Shorter terms are only fixed for case and punctuation
+GLOSSARY_FUZZY_MAX_RATIO = 0.15  # Edits allowed per letter of a term: one from 7 letters, two from 14
+GLOSSARY_COMMON_WORD_ZIPF = 3.0  # With wordfreq installed, words this frequent (Zipf scale) are never corrected
+
+# --- Model registry settings ---
+MODEL_OPTIONS = ["tiny", "base", "small", "medium", "large-v2", "large-v3", "tiny.en", "base.en", "small.en", "medium.en"]
+MODEL_MEMORY_BUDGET_MB = 2500    # Resident Whisper models beyond this are evicted, least recently used first
+MODEL_ESTIMATED_MB = {"tiny": 80, "base": 150, "small": 500, "medium": 1000, "large-v2": 1800, "large-v3": 1800} # Rough int8 CPU footprint
+
+# --- Decode profiles ---
+# WhisperModel construction arguments are shared by every profile, so switching profiles (by hand
+# or by the auto-tuner) never loads another model instance; a profile is the options passed to
+# every transcribe call.
+DECODE_CPU_THREADS = min(8, os.cpu_count() or 4)
+DECODE_MODEL_OPTIONS = {"compute_type": "int8", "cpu_threads": DECODE_CPU_THREADS, "num_workers": 1}
+DECODE_PROFILES = {
+    "realtime": {"beam_size": 1, "best_of": 1, "temperature": [0.0, 0.4, 0.8], "condition_on_previous_text": False},
+    "balanced": {"beam_size": 2, "best_of": 2, "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0], "condition_on_previous_text": False},
+    "accurate": {"beam_size": 5, "best_of": 5, "temperature": [0.0, 0.2, 0.4, 0.6, 0.8, 1.0], "condition_on_previous_text": True},
+}
+DECODE_PROFILE_ORDER = ["accurate", "balanced", "realtime"] # Most to least expensive
+DEFAULT_DECODE_PROFILE = "accurate"
+
+# --- Auto-tuner settings ---
+AUTO_TUNE_WINDOW = 5             # Recent transcribe calls averaged before deciding
+AUTO_TUNE_STEP_DOWN_RTF = 0.8    # Step down when decoding takes this fraction of real time...
+AUTO_TUNE_STEP_DOWN_LAG_S = 6.0  # ...or buffered audio lags this far behind
+AUTO_TUNE_STEP_UP_RTF = 0.3      # Step back up (never past the chosen profile) when this far ahead
+
+# --- Decode batching settings ---
+DECODE_BATCH_WINDOW_S = 0.05     # With several inputs, an utterance waits this long for others to batch with
+DECODE_BATCH_MAX = 8             # Utterances encoded and decoded together in one batch
+
+# --- Backpressure settings ---
+BACKPRESSURE_POLICIES = ["skip_silence", "shorten_windows", "smaller_model", "drop_oldest"]
+BACKPRESSURE_POLICY = "skip_silence" # What to give up while an input is too far behind (see CaptionEngine.update_backpressure)
+BACKPRESSURE_MAX_LAG_S = 8.0     # Untranscribed audio that starts load shedding
+BACKPRESSURE_TARGET_LAG_S = 2.0  # Lag at which shedding stops, and what dropping audio catches up to
+BACKPRESSURE_HARD_LAG_S = 20.0   # Past this the oldest audio is dropped whatever the policy
+BACKPRESSURE_MIN_UTTERANCE_S = 1.0 # skip_silence: shorter utterances (coughs, "uh") are not decoded
+BACKPRESSURE_SMALLER_MODEL = {"large-v3": "medium", "large-v2": "medium", "medium": "small", "small": "base", "base": "tiny",
+                              "medium.en": "small.en", "small.en": "base.en", "base.en": "tiny.en"}
+SKIPPED_AUDIO_MARKER = "[audio skipped]"
+
+# --- Batch transcription settings ---
+BATCH_MAX_SEGMENT_S = 30         # Whisper's native window; longer speech is split at the quietest frame
+BATCH_OUTPUT_FORMATS = ["srt", "vtt", "txt", "jsonl"]
+
+# --- Inference server settings ---
+INFERENCE_SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".lively_captions", "inference.sock")
+INFERENCE_SERVER_SLOTS = 1       # Decodes the server runs at once, shared fairly by all clients
+INFERENCE_SHM_CAPACITY_S = 5     # Seconds of PCM in each client's shared-memory ring
+
+# --- Benchmark settings ---
+BENCH_SAMPLE_INTERVAL_S = 0.25   # How often queue depth and memory are sampled during a run
+
+# --- Metrics settings ---
+METRICS_WINDOW = 50              # Recent observations kept per timing
+METRICS_OVERLAY_INTERVAL_MS = 1000
+METRICS_EXPORT_PATH = "lively_metrics.jsonl"
+METRICS_EXPORT_INTERVAL_S = 10.0
+
+# --- Translation worker settings ---
+TRANSLATION_WORKERS = 2          # Concurrent translation requests
+TRANSLATION_TIMEOUT_S = 6.0      # Per-request timeout before the line is marked as timed out
+TRANSLATION_MAX_BACKLOG = 8      # Queued (not yet started) requests before the oldest is dropped
+TRANSLATION_PLACEHOLDER = "…"
+TRANSLATION_BACKEND = "auto"     # "online" (translators), "offline" (argostranslate) or "auto" (online, offline on failure)
+TRANSLATION_BATCH_WINDOW_S = 0.3 # Short lines arriving this close together share one request
+TRANSLATION_BATCH_MAX_CHARS = 120
+TRANSLATION_BATCH_MAX_LINES = 8
+
+# --- Caption history settings ---
+CAPTION_RENDER_MAX_RECORDS = 300 # Captions kept in the text widget; older ones page back in on scroll
+CAPTION_PAGE_RECORDS = 50        # Captions paged in or out at a time
+
+# --- Transcript log settings ---
+TRANSCRIPT_DIR = os.path.join(os.path.expanduser("~"), ".lively_captions", "transcripts")
+TRANSCRIPT_FSYNC_INTERVAL_S = 5.0 # Buffered writes are flushed and fsync'd at least this often
+
+# --- Translation cache settings ---
+TRANSLATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".lively_captions", "translation_cache.sqlite3")
+TRANSLATION_CACHE_MEMORY_ENTRIES = 2000
+TRANSLATION_CACHE_MAX_ROWS = 100_000
+TRANSLATION_CACHE_TTL_S = 30 * 24 * 3600
+
+
+class AudioRingBuffer:
+    """Fixed-capacity float32 ring buffer for the mono capture stream.
+
+    One writer (the PortAudio callback) and one reader (the transcription thread). Positions are
+    absolute sample indices since the last reset, so they double as the capture sample clock.
+    If the reader falls behind by more than the capacity, the oldest unread samples are
+    overwritten and counted in `dropped_samples` instead of growing memory.
+    """
+
+    def __init__(self, capacity_samples, sample_rate=AUDIO_SAMPLE_RATE):
+        self.capacity = int(capacity_samples)
+        self.sample_rate = sample_rate
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._scratch = np.empty(self.capacity, dtype=np.float32) # Reused for windows that wrap around
+        self._cond = threading.Condition()
+        self.reset()
+
+    def reset(self):
+        with self._cond:
+            self._write_pos = 0
+            self._read_pos = 0
+            self.dropped_samples = 0
+            self.max_lag_samples = 0
+
+    def write(self, samples):
+        """Copies a block of samples in; called from the audio callback, never allocates."""
+        n = len(samples)
+        if n == 0:
+            return
+        with self._cond:
+            if n > self.capacity: # Only the newest `capacity` samples can be kept
+                self._write_pos += n - self.capacity
+                samples = samples[-self.capacity:]
+                n = self.capacity
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            if first < n:
+                self._data[:n - first] = samples[first:]
+            self._write_pos += n
+
+            overflow = self._write_pos - self._read_pos - self.capacity
+            if overflow > 0:
+                self._read_pos += overflow
+                self.dropped_samples += overflow
+            self.max_lag_samples = max(self.max_lag_samples, self._write_pos - self._read_pos)
+            self._cond.notify_all()
+
+    def latest(self, n):
+        """Copy of the newest `n` written samples (read or not), e.g. for level metering."""
+        with self._cond:
+            n = min(n, self._write_pos, self.capacity)
+            end = self._write_pos % self.capacity
+            if n <= end:
+                return self._data[end - n:end].copy()
+            return np.concatenate((self._data[self.capacity - (n - end):], self._data[:end]))
+
+    @property
+    def read_position(self):
+        return self._read_pos
+
+    @property
+    def write_position(self):
+        return self._write_pos
+
+    def available(self):
+        with self._cond:
+            return self._write_pos - self._read_pos
+
+    def wait_for(self, n, timeout):
+        """Blocks until at least `n` unread samples are buffered or the timeout expires."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._write_pos - self._read_pos >= n, timeout)
+
+    def wait_until(self, position, timeout):
+        """Blocks until the writer has reached absolute sample `position` or the timeout expires."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._write_pos >= position, timeout)
+
+    def wait_for_space(self, n, timeout):
+        """Blocks until `n` samples can be written without overrunning unread audio."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.capacity - (self._write_pos - self._read_pos) >= n, timeout)
+
+    def peek(self, n, start_pos=None):
+        """Returns `(start_pos, window)` for up to `n` unread samples without consuming them.
+
+        Reads from the oldest unread sample unless `start_pos` is given (clamped to the unread
+        range). The window is a zero-copy view of the ring when it does not wrap around,
+        otherwise a copy in a reused scratch buffer. Either way it is only valid until the next
+        `peek`, and its contents are only guaranteed if `release` reports it intact.
+        """
+        with self._cond:
+            start_pos = self._read_pos if start_pos is None else min(max(start_pos, self._read_pos), self._write_pos)
+            n = max(0, min(n, self._write_pos - start_pos))
+            start = start_pos % self.capacity
+            if start + n <= self.capacity:
+                return start_pos, self._data[start:start + n]
+            first = self.capacity - start
+            self._scratch[:first] = self._data[start:]
+            self._scratch[first:n] = self._data[:n - first]
+            return start_pos, self._scratch[:n]
+
+    def release(self, start_pos, n):
+        """Consumes a window returned by `peek`; False if the writer overran it meanwhile."""
+        with self._cond:
+            intact = self._read_pos == start_pos
+            self._read_pos = max(self._read_pos, min(start_pos + n, self._write_pos))
+            self._cond.notify_all()
+            return intact
+
+    def discard_until(self, position):
+        """Drops unread samples before absolute `position` (e.g. silence nobody will decode)."""
+        with self._cond:
+            self._read_pos = max(self._read_pos, min(position, self._write_pos))
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "lag_s": (self._write_pos - self._read_pos) / self.sample_rate,
+                "max_lag_s": self.max_lag_samples / self.sample_rate,
+                "dropped_samples": self.dropped_samples,
+            }
+
+
+class UtteranceSegmenter:
+    """Energy-based voice activity detector that cuts the capture stream into utterances.
+
+    Fed consecutive blocks of audio, it returns `(start_pos, end_pos)` ranges of padded speech on
+    the absolute capture clock, so silence never reaches the model. Utterances longer than
+    `max_utterance_s` are split at the quietest frame of the last second.
+    """
+
+    def __init__(self, sample_rate=AUDIO_SAMPLE_RATE, frame_ms=VAD_FRAME_MS, threshold_db=VAD_THRESHOLD_DB,
+                 noise_margin_db=VAD_NOISE_MARGIN_DB, min_speech_ms=VAD_MIN_SPEECH_MS,
+                 min_silence_ms=VAD_MIN_SILENCE_MS, padding_ms=VAD_PADDING_MS, max_utterance_s=VAD_MAX_UTTERANCE_S):
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.min_speech_frames = max(1, round(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, round(min_silence_ms / frame_ms))
+        self.padding_samples = int(sample_rate * padding_ms / 1000)
+        self.max_utterance_samples = int(sample_rate * max_utterance_s)
+        self.quiet_frames = collections.deque(maxlen=max(1, round(1000 / frame_ms)))
+        self.reset(0)
+
+    def reset(self, position):
+        self.position = position # Next sample to scan
+        self.noise_db = self.threshold_db - self.noise_margin_db
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.utterance_start = position
+        self.last_speech_end = position
+        self.last_emitted_end = position
+        self.quiet_frames.clear()
+
+    @property
+    def release_position(self):
+        """Audio before this position is not part of any current or future utterance."""
+        if self.in_speech:
+            return self.utterance_start
+        return self.position - self.padding_samples - self.speech_run * self.frame_samples
+
+    def feed(self, samples):
+        """Scans whole frames of `samples` (which start at `self.position`); returns ended utterances."""
+        n_frames = len(samples) // self.frame_samples
+        if n_frames == 0:
+            return []
+        frames = samples[:n_frames * self.frame_samples].reshape(n_frames, self.frame_samples)
+        levels_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        utterances = []
+        for level_db in levels_db:
+            self.position += self.frame_samples
+            is_speech = level_db > max(self.threshold_db, self.noise_db + self.noise_margin_db)
+            if not self.in_speech:
+                if not is_speech:
+                    self.speech_run = 0
+                    # Follow the background level slowly so steady room noise is not taken for speech.
+                    self.noise_db = max(-90.0, self.noise_db + 0.05 * (level_db - self.noise_db))
+                    continue
+                self.speech_run += 1
+                if self.speech_run >= self.min_speech_frames:
+                    speech_start = self.position - self.speech_run * self.frame_samples
+                    self.utterance_start = max(self.last_emitted_end, speech_start - self.padding_samples)
+                    self.last_speech_end = self.position
+                    self.in_speech = True
+                    self.silence_run = 0
+                    self.quiet_frames.clear()
+                continue
+
+            if is_speech:
+                self.last_speech_end = self.position
+                self.silence_run = 0
+            else:
+                self.silence_run += 1
+                if self.silence_run >= self.min_silence_frames:
+                    utterances.append(self.end_utterance(min(self.last_speech_end + self.padding_samples, self.position)))
+                    continue
+            self.quiet_frames.append((level_db, self.position))
+            if self.position - self.utterance_start >= self.max_utterance_samples:
+                _, split_pos = min(self.quiet_frames)
+                utterances.append((self.utterance_start, split_pos))
+                self.utterance_start = self.last_emitted_end = split_pos
+                self.quiet_frames.clear()
+        return utterances
+
+    def flush(self):
+        """Closes an utterance still in progress (e.g. when capture stops)."""
+        return [self.end_utterance(self.position)] if self.in_speech else []
+
+    def end_utterance(self, end_pos):
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.last_emitted_end = end_pos
+        return (self.utterance_start, end_pos)
+
+
+class LocalAgreementBuffer:
+    """Commits streaming words once two consecutive decodes of the sliding window agree.
+
+    Words are `(start_s, end_s, text)` tuples on the absolute capture clock. Whatever the latest
+    decode produced past the agreed prefix is the unstable partial hypothesis.
+    """
+
+    def __init__(self):
+        self.committed_end_s = 0.0
+        self.previous = []
+        self.recent_committed = collections.deque(maxlen=STREAMING_PROMPT_WORDS)
+
+    @staticmethod
+    def normalize(word):
+        return re.sub(r"[^\w']", "", word.lower())
+
+    def insert(self, words):
+        """Feeds one decode of the window; returns `(newly_committed, partial)`."""
+        words = [w for w in words if w[0] >= self.committed_end_s - 0.1]
+        words = self.strip_overlap(words)
+        agreed = 0
+        for previous_word, word in zip(self.previous, words):
+            if self.normalize(previous_word[2]) != self.normalize(word[2]):
+                break
+            agreed += 1
+        committed = words[:agreed]
+        self.previous = words[agreed:]
+        self.commit(committed)
+        return committed, list(self.previous)
+
+    def commit_pending(self):
+        """Commits the current partial hypothesis as-is (window too long, or stopping)."""
+        committed, self.previous = self.previous, []
+        self.commit(committed)
+        return committed
+
+    def commit(self, words):
+        if words:
+            self.committed_end_s = words[-1][1]
+            self.recent_committed.extend(w[2] for w in words)
+
+    def strip_overlap(self, words):
+        # Whisper often repeats the tail of the committed text at the start of the trimmed window.
+        recent = [self.normalize(w) for w in self.recent_committed]
+        for n in range(min(len(recent), len(words), 5), 0, -1):
+            if recent[-n:] == [self.normalize(w[2]) for w in words[:n]]:
+                return words[n:]
+        return words
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between `a` and `b`, or `limit + 1` once it is known to exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class Glossary:
+    """Session vocabulary (names, jargon) that biases decoding and fixes near-misses in captions.
+
+    Loaded from a text file with one term per line (`#` starts a comment). The terms go into the
+    decoder prompt, and `correct` replaces a word (or a few words Whisper split a term into) that
+    is within a small edit distance of a term. Near-misses are found through an index of every
+    term with one letter deleted, so a lookup costs a few dict probes rather than a scan. Only
+    long terms take near-misses, and everyday words (per `wordfreq`, when installed) are left alone.
+    """
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(term.strip() for term in terms if term.strip()))
+        self.prompt_words = ("Glossary: " + ", ".join(self.terms) + ".").split() if self.terms else []
+        self.hotwords = ", ".join(self.terms)
+        self.max_words = max((len(term.split()) for term in self.terms), default=1) + 1 # +1: terms split in two
+        self.exact = {} # compact form -> term
+        self.word_counts = {} # compact form -> words in the term
+        self.deletes = collections.defaultdict(set) # compact form minus one letter -> compact forms
+        for term in self.terms:
+            key = self.compact(term)
+            if key:
+                self.exact[key] = term
+                self.word_counts[key] = len(term.split())
+                if len(key) >= GLOSSARY_FUZZY_MIN_CHARS:
+                    for variant in self.deletions(key):
+                        self.deletes[variant].add(key)
+        self.max_chars = max(map(len, self.exact), default=0) + 2
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(line.split("#", 1)[0] for line in f)
+
+    @staticmethod
+    def compact(text):
+        """Case, spaces and punctuation removed, so "Open AI," matches "OpenAI"."""
+        return re.sub(r"[\W_]", "", text.lower())
+
+    @staticmethod
+    def deletions(key):
+        return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+    @staticmethod
+    def is_common_word(word):
+        return zipf_frequency is not None and zipf_frequency(word, "en") >= GLOSSARY_COMMON_WORD_ZIPF
+
+    def lookup(self, key, n_words, fuzzy=True):
+        """The term `key` (spanning `n_words` words) stands for, if any. Near-misses must span as
+        many words as the term, so a neighbouring word is never swallowed into it."""
+        term = self.exact.get(key)
+        if term is not None or not fuzzy or len(key) < GLOSSARY_FUZZY_MIN_CHARS - 1 or len(key) > self.max_chars:
+            return term
+        candidates = set()
+        for variant in self.deletions(key):
+            candidates |= self.deletes.get(variant, set())
+        best, best_distance = None, None
+        for candidate in sorted(candidates):
+            if self.word_counts[candidate] != n_words:
+                continue
+            limit = int(len(candidate) * GLOSSARY_FUZZY_MAX_RATIO)
+            distance = edit_distance(key, candidate, limit)
+            if distance <= limit and (best is None or distance < best_distance):
+                best, best_distance = candidate, distance
+        return self.exact[best] if best is not None else None
+
+    def correct(self, text):
+        """Returns `(text, corrections)` with glossary near-misses replaced by the terms themselves."""
+        if not self.exact:
+            return text, 0
+        words = list(re.finditer(r"\S+", text))
+        pieces, corrections, i, copied_to = [], 0, 0, 0
+        while i < len(words):
+            for n in range(min(self.max_words, len(words) - i), 0, -1):
+                start, end = words[i].start(), words[i + n - 1].end()
+                # Keep the punctuation around the span (and a possessive 's); only the words themselves are compared.
+                core = re.match(r"^(\W*)(.*?)((?:['’]s)?\W*)$", text[start:end], re.S)
+                common = all(self.is_common_word(word) for word in core.group(2).lower().split())
+                term = self.lookup(self.compact(core.group(2)), n, fuzzy=not common)
+                if term is not None:
+                    break
+            else:
+                i += 1
+                continue
+            # Everyday words keep their case too ("cut me some slack" with "Slack" in the glossary).
+            if core.group(2) != term and not (common and core.group(2).lower() == term.lower()):
+                pieces.append(text[copied_to:start + core.start(2)] + term)
+                copied_to = start + core.end(2)
+                corrections += 1
+            i += n
+        pieces.append(text[copied_to:])
+        return "".join(pieces), corrections
+
+
+class PromptCache:
+    """Builds `initial_prompt` token ids from the glossary and recent words without re-tokenizing.
+
+    Whisper's tokenizer splits text at spaces before merging, so a prompt is the concatenation of
+    its words' encodings. Those are cached per model (LRU), and the glossary part per glossary.
+    """
+
+    def __init__(self, max_entries=PROMPT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._words = weakref.WeakKeyDictionary() # model -> OrderedDict(word -> token ids)
+        self._glossaries = weakref.WeakKeyDictionary() # model -> (glossary, token ids)
+
+    def encode(self, model, words):
+        with self._lock:
+            cache = self._words.setdefault(model, collections.OrderedDict())
+            ids = []
+            for word in words:
+                tokens = cache.get(word)
+                if tokens is None:
+                    tokens = cache[word] = model.hf_tokenizer.encode(" " + word, add_special_tokens=False).ids
+                    if len(cache) > self.max_entries:
+                        cache.popitem(last=False)
+                else:
+                    cache.move_to_end(word)
+                ids.extend(tokens)
+            return ids
+
+    def glossary_ids(self, model, glossary):
+        cached = self._glossaries.get(model)
+        if cached is None or cached[0] is not glossary:
+            cached = (glossary, self.encode(model, glossary.prompt_words)[:GLOSSARY_PROMPT_MAX_TOKENS])
+            self._glossaries[model] = cached
+        return cached[1]
+
+    def prompt(self, model, glossary, context_words):
+        """Glossary tokens followed by as many of the newest context words as fit; None if both are empty."""
+        ids = list(self.glossary_ids(model, glossary)) if glossary else []
+        budget = PROMPT_MAX_TOKENS - len(ids)
+        if context_words and budget > 0:
+            context = self.encode(model, context_words)
+            ids.extend(context[max(0, len(context) - budget):])
+        return ids or None
+
+
+class ModelRegistry:
+    """Loads Whisper models on background threads and keeps recently used ones resident.
+
+    Models are keyed by size plus their `WhisperModel` keyword arguments. Once the estimated
+    footprint of resident models exceeds the memory budget, the least recently used ones are
+    dropped, so switching back to a recent size is instant.
+    """
+
+    def __init__(self, memory_budget_mb=MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self._models = collections.OrderedDict() # key -> WhisperModel, least recently used first
+        self._loading = {}                       # key -> list of callbacks waiting on that load
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(size, **model_kwargs):
+        return (size,) + tuple(sorted(model_kwargs.items()))
+
+    def get(self, size, **model_kwargs):
+        """Returns the resident model (marking it recently used) or None."""
+        key = self.make_key(size, **model_kwargs)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    def load_async(self, size, callback, **model_kwargs):
+        """Calls `callback(size, model, load_s, error)` on a worker thread once the model is ready."""
+        key = self.make_key(size, **model_kwargs)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            elif key in self._loading:
+                self._loading[key].append(callback)
+                return
+            else:
+                self._loading[key] = [callback]
+        if model is not None:
+            callback(size, model, 0.0, None)
+            return
+        threading.Thread(target=self._load_worker, args=(key, size, model_kwargs), name=f"model-loader-{size}", daemon=True).start()
+
+    def load(self, size, **model_kwargs):
+        """Blocking variant of `load_async`; raises if loading fails."""
+        done = threading.Event()
+        result = {}
+
+        def on_loaded(size, model, load_s, error):
+            result.update(model=model, error=error)
+            done.set()
+
+        self.load_async(size, on_loaded, **model_kwargs)
+        done.wait()
+        if result["error"] is not None:
+            raise result["error"]
+        return result["model"]
+
+    def _load_worker(self, key, size, model_kwargs):
+        load_start = time.perf_counter()
+        model, error = None, None
+        try:
+            model = WhisperModel(size, **model_kwargs)
+        except Exception as e:
+            error = e
+        load_s = time.perf_counter() - load_start
+        with self._lock:
+            callbacks = self._loading.pop(key, [])
+            if model is not None:
+                self._models[key] = model
+                self._evict_locked(keep=key)
+        for callback in callbacks:
+            callback(size, model, load_s, error)
+
+    def _evict_locked(self, keep):
+        def footprint():
+            return sum(MODEL_ESTIMATED_MB.get(k[0], 500) for k in self._models)
+        for key in list(self._models):
+            if footprint() <= self.memory_budget_mb:
+                break
+            if key != keep:
+                print(f"Evicting Whisper model '{key[0]}' to stay within {self.memory_budget_mb} MB")
+                del self._models[key]
+
+
+class DecodeAutoTuner:
+    """Steps down to cheaper decode profiles when recent transcribe calls fall behind real time.
+
+    The profile chosen by the user is the ceiling: the tuner steps back up towards it once
+    decoding is comfortably faster than real time again.
+    """
+
+    def __init__(self, profile_name, window=AUTO_TUNE_WINDOW):
+        self.rtfs = collections.deque(maxlen=window)
+        self.set_ceiling(profile_name)
+
+    def set_ceiling(self, profile_name):
+        self.ceiling = profile_name
+        self.profile = profile_name
+        self.rtfs.clear()
+
+    def record(self, audio_s, decode_s, lag_s):
+        """Feeds one transcribe call; returns the new profile name if the tuner switched."""
+        if audio_s <= 0:
+            return None
+        self.rtfs.append(decode_s / audio_s)
+        if len(self.rtfs) < self.rtfs.maxlen:
+            return None
+        mean_rtf = sum(self.rtfs) / len(self.rtfs)
+        idx = DECODE_PROFILE_ORDER.index(self.profile)
+        if (mean_rtf > AUTO_TUNE_STEP_DOWN_RTF or lag_s > AUTO_TUNE_STEP_DOWN_LAG_S) and idx < len(DECODE_PROFILE_ORDER) - 1:
+            self.profile = DECODE_PROFILE_ORDER[idx + 1]
+        elif mean_rtf < AUTO_TUNE_STEP_UP_RTF and lag_s < 1.0 and idx > DECODE_PROFILE_ORDER.index(self.ceiling):
+            self.profile = DECODE_PROFILE_ORDER[idx - 1]
+        else:
+            return None
+        self.rtfs.clear() # Judge the new profile on its own calls
+        return self.profile
+
+
+class PipelineMetrics:
+    """Thread-safe counters, gauges and rolling timings for the caption pipeline.
+
+    Gauges are callables evaluated at snapshot time, so hot paths only pay for `incr` and
+    `observe`. Startup timings are kept across `reset`. `start_export` appends a snapshot to a
+    JSON lines file periodically.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._gauges = {} # name -> callable returning a number or dict
+        self._export_stop = None
+        self.startup = {} # first_paint_s, model_ready_s, model_load_s, model_switch_s
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.counters = collections.defaultdict(float)
+            self.timings = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, name, value):
+        with self._lock:
+            self.timings[name].append(value)
+
+    def record_startup(self, name, seconds):
+        with self._lock:
+            self.startup[name] = seconds
+
+    def register_gauge(self, name, fn):
+        self._gauges[name] = fn
+
+    def last(self, name, default=None):
+        with self._lock:
+            values = self.timings.get(name)
+            return values[-1] if values else default
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            startup = dict(self.startup)
+            timings = {}
+            for name, values in self.timings.items():
+                if values:
+                    ordered = sorted(values)
+                    timings[name] = {"last": values[-1], "mean": sum(values) / len(values),
+                                     "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], "count": len(values)}
+        gauges = {}
+        for name, fn in list(self._gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {"time": time.time(), "uptime_s": time.time() - self.started_at,
+                "counters": counters, "gauges": gauges, "timings": timings, "startup": startup}
+
+    def start_export(self, path=METRICS_EXPORT_PATH, interval_s=METRICS_EXPORT_INTERVAL_S):
+        self.stop_export()
+        stop = self._export_stop = threading.Event()
+
+        def export_loop():
+            while not stop.wait(interval_s):
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(self.snapshot()) + "\n")
+                except OSError as e:
+                    print(f"Metrics export failed: {e}", file=sys.stderr)
+
+        threading.Thread(target=export_loop, name="metrics-export", daemon=True).start()
+
+    def stop_export(self):
+        if self._export_stop:
+            self._export_stop.set()
+            self._export_stop = None
+
+
+class SpeakerEmbedder:
+    """Cheap voice signature for an utterance: the mean and spread of its cepstrum over the
+    louder half of its frames, without c0 (loudness), scaled to unit length."""
+
+    def __init__(self, sample_rate=AUDIO_SAMPLE_RATE, n_bands=SPEAKER_EMBEDDING_BANDS, n_fft=512):
+        self.frame_samples = int(sample_rate * 0.025)
+        self.hop_samples = int(sample_rate * 0.010)
+        self.n_fft = n_fft
+        self.window = np.hanning(self.frame_samples).astype(np.float32)
+        # Triangular mel filters and a DCT-II matrix, built once.
+        mel_points = np.linspace(0, 2595 * np.log10(1 + (sample_rate / 2) / 700), n_bands + 2)
+        bins = np.floor((n_fft + 1) * 700 * (10 ** (mel_points / 2595) - 1) / sample_rate).astype(int)
+        self.filterbank = np.zeros((n_bands, n_fft // 2 + 1), dtype=np.float32)
+        for i in range(n_bands):
+            left, center, right = bins[i], bins[i + 1], max(bins[i + 2], bins[i + 1] + 1)
+            self.filterbank[i, left:center] = (np.arange(left, center) - left) / max(center - left, 1)
+            self.filterbank[i, center:right] = (right - np.arange(center, right)) / (right - center)
+        k = np.arange(n_bands)
+        self.dct = np.cos(np.pi / n_bands * (k[:, None] + 0.5) * k[None, 1:]).astype(np.float32) # Drops c0
+
+    def embed(self, audio):
+        """Returns a unit vector, or None if `audio` is too short to say anything."""
+        if len(audio) < self.frame_samples * 10:
+            return None
+        frames = np.lib.stride_tricks.sliding_window_view(audio, self.frame_samples)[::self.hop_samples] * self.window
+        power = np.abs(np.fft.rfft(frames, n=self.n_fft)) ** 2
+        log_mel = np.log(power @ self.filterbank.T + 1e-10)
+        energy = log_mel.mean(axis=1)
+        cepstrum = log_mel[energy >= np.median(energy)] @ self.dct
+        embedding = np.concatenate([cepstrum.mean(axis=0), cepstrum.std(axis=0)])
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else None
+
+
+class SpeakerClusterer:
+    """Online clustering of utterance embeddings into a bounded table of voices.
+
+    An embedding joins the most similar voice if it is close enough (or the table is full),
+    otherwise it starts a new one. Voices are numbered from 0 in order of appearance.
+    """
+
+    def __init__(self, max_speakers=SPEAKER_MAX_CLUSTERS, threshold=SPEAKER_MATCH_THRESHOLD):
+        self.max_speakers = max_speakers
+        self.threshold = threshold
+        self._lock = threading.Lock() # Inputs are transcribed on separate threads
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.centroids = np.zeros((0, 0), dtype=np.float32)
+            self.counts = []
+
+    def assign(self, embedding):
+        with self._lock:
+            if len(self.counts):
+                similarity = self.centroids @ embedding
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.threshold or len(self.counts) >= self.max_speakers:
+                    count = self.counts[best]
+                    centroid = self.centroids[best] * count + embedding
+                    self.centroids[best] = centroid / np.linalg.norm(centroid)
+                    self.counts[best] = min(count + 1, SPEAKER_CENTROID_MEMORY)
+                    return best
+                self.centroids = np.vstack([self.centroids, embedding])
+            else:
+                self.centroids = embedding[None, :].astype(np.float32)
+            self.counts.append(1)
+            return len(self.counts) - 1
+
+
+class LanguageTracker:
+    """Remembers each speaker's language so Auto-Detect runs once per speaker, not once per decode.
+
+    `language_for` returns the language to force, or None when a detection is due. A confident
+    detection sets a new speaker's language; replacing it takes LANGUAGE_SWITCH_DETECTIONS
+    confident detections in a row. Forced decodes that score poorly trigger a new detection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._speakers = {} # speaker -> {"language", "recheck", "candidate", "votes"}
+
+    def language_for(self, speaker):
+        with self._lock:
+            state = self._speakers.get(speaker)
+            if state is None or state["recheck"]:
+                return None
+            return state["language"]
+
+    def observe_detection(self, speaker, language, probability):
+        with self._lock:
+            state = self._speakers.setdefault(speaker, {"language": None, "recheck": False, "candidate": None, "votes": 0})
+            state["recheck"] = False
+            if probability < LANGUAGE_CONFIDENT_PROB or language == state["language"]:
+                if language == state["language"]:
+                    state["candidate"], state["votes"] = None, 0
+                return
+            if state["language"] is None:
+                state["language"] = language
+                return
+            if language == state["candidate"]:
+                state["votes"] += 1
+            else:
+                state["candidate"], state["votes"] = language, 1
+            if state["votes"] >= LANGUAGE_SWITCH_DETECTIONS:
+                state["language"], state["candidate"], state["votes"] = language, None, 0
+            else:
+                state["recheck"] = True # Keep detecting until the switch is confirmed or rejected
+
+    def observe_decode(self, speaker, segments):
+        """Schedules a new detection when a forced-language decode looks like the wrong language."""
+        logprobs = [segment.avg_logprob for segment in segments if getattr(segment, "avg_logprob", None) is not None]
+        if logprobs and sum(logprobs) / len(logprobs) < LANGUAGE_RECHECK_LOGPROB:
+            with self._lock:
+                if speaker in self._speakers:
+                    self._speakers[speaker]["recheck"] = True
+
+
+class TranslationBackend:
+    """A translation service usable by TranslationWorkerPool.
+
+    Subclasses implement `translate`; `translate_batch` returns `(translations, produced_by)` so
+    results from a fallback service can be told apart from the primary one.
+    """
+    name = "base"
+
+    def translate(self, text, source_lang, target_lang):
+        raise NotImplementedError
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        return [self.translate(text, source_lang, target_lang) for text in texts], self.name
+
+
+class OnlineTranslationBackend(TranslationBackend):
+    """Remote translation through the `translators` package."""
+    name = "online"
+
+    def translate(self, text, source_lang, target_lang):
+        if ts is None:
+            raise RuntimeError("translators could not be loaded (no network at startup?)")
+        return ts.translate_text(text, to_language=target_lang, from_language=source_lang)
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        if len(texts) == 1:
+            return [self.translate(texts[0], source_lang, target_lang)], self.name
+        # One request for the whole batch, one caption per line.
+        joined = self.translate("\n".join(text.replace("\n", " ") for text in texts), source_lang, target_lang)
+        lines = [line.strip() for line in joined.split("\n") if line.strip()]
+        if len(lines) == len(texts):
+            return lines, self.name
+        return super().translate_batch(texts, source_lang, target_lang) # The service merged or split lines
+
+
+class OfflineTranslationBackend(TranslationBackend):
+    """Local translation with argostranslate (language packages must be installed)."""
+    name = "offline"
+
+    def __init__(self):
+        if argos_translate is None:
+            raise RuntimeError("argostranslate is not installed")
+
+    def translate(self, text, source_lang, target_lang):
+        if source_lang in (None, "auto"):
+            raise ValueError("Offline translation needs a known source language")
+        return argos_translate.translate(text, source_lang, target_lang)
+
+
+class FallbackTranslationBackend(TranslationBackend):
+    """Uses `primary`, falling back to `fallback` when it fails (e.g. no network)."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = primary.name
+
+    def translate(self, text, source_lang, target_lang):
+        return self.translate_batch([text], source_lang, target_lang)[0][0]
+
+    def translate_batch(self, texts, source_lang, target_lang):
+        try:
+            return self.primary.translate_batch(texts, source_lang, target_lang)
+        except Exception as e:
+            print(f"{self.primary.name} translation failed ({e}); using {self.fallback.name}", file=sys.stderr)
+            return self.fallback.translate_batch(texts, source_lang, target_lang)
+
+
+def make_translation_backend(kind=TRANSLATION_BACKEND):
+    if kind == "online":
+        return OnlineTranslationBackend()
+    if kind == "offline":
+        return OfflineTranslationBackend()
+    if ts is None and argos_translate is not None:
+        return OfflineTranslationBackend()
+    if argos_translate is not None:
+        return FallbackTranslationBackend(OnlineTranslationBackend(), OfflineTranslationBackend())
+    return OnlineTranslationBackend()
+
+
+class TranslationCache:
+    """In-memory LRU in front of a SQLite store, keyed by (text, source, target, backend).
+
+    Entries expire after `ttl_s`; the on-disk table is pruned to `max_rows`, oldest first. If the
+    database cannot be opened the cache keeps working from memory only.
+    """
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH, memory_entries=TRANSLATION_CACHE_MEMORY_ENTRIES,
+                 max_rows=TRANSLATION_CACHE_MAX_ROWS, ttl_s=TRANSLATION_CACHE_TTL_S):
+        self.memory_entries = memory_entries
+        self.max_rows = max_rows
+        self.ttl_s = ttl_s
+        self._memory = collections.OrderedDict() # key -> (translation, created_at)
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self._db = None
+        if path:
+            try:
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS translations (text TEXT, source TEXT, target TEXT, backend TEXT, "
+                                 "translation TEXT, created_at REAL, PRIMARY KEY (text, source, target, backend))")
+                self._db.execute("CREATE INDEX IF NOT EXISTS translations_created_at ON translations (created_at)")
+                with self._lock:
+                    self._prune_locked()
+            except sqlite3.Error as e:
+                print(f"Translation cache unavailable ({e}); caching in memory only", file=sys.stderr)
+                self._db = None
+
+    def get_memory(self, key):
+        """Memory-only lookup, cheap enough for the caller's thread."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl_s:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[0]
+
+    def get(self, key):
+        translation = self.get_memory(key)
+        if translation is not None or self._db is None:
+            return translation
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT translation, created_at FROM translations WHERE text=? AND source=? AND target=? AND backend=?",
+                                       key).fetchone()
+            except sqlite3.Error as e:
+                print(f"Translation cache read failed: {e}", file=sys.stderr)
+                return None
+            if row is None or time.time() - row[1] > self.ttl_s:
+                return None
+            self._remember_locked(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key, translation):
+        created_at = time.time()
+        with self._lock:
+            self._remember_locked(key, translation, created_at)
+            if self._db is None:
+                return
+            try:
+                self._db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", key + (translation, created_at))
+                self._db.commit()
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= 500:
+                    self._prune_locked()
+            except sqlite3.Error as e:
+                print(f"Translation cache write failed: {e}", file=sys.stderr)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember_locked(self, key, translation, created_at):
+        self._memory[key] = (translation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _prune_locked(self):
+        self._puts_since_prune = 0
+        self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_s,))
+        self._db.execute("DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                         (self.max_rows,))
+        self._db.commit()
+
+
+class TranslationWorkerPool:
+    """Runs translations on background threads so the Tk loop never waits on the network.
+
+    Results are handed to `on_result(job_id, status, text)` in submission order per speaker,
+    where status is one of "ok", "error", "timeout" or "dropped". `on_result` is called while
+    the pool lock is held, so it must only schedule work (e.g. via `root.after`).
+
+    Lines found in `cache` skip the backend entirely; short lines for the same language pair
+    that arrive within `batch_window_s` of each other are sent as a single request.
+    """
+
+    def __init__(self, backend, on_result, max_workers=TRANSLATION_WORKERS,
+                 timeout_s=TRANSLATION_TIMEOUT_S, max_backlog=TRANSLATION_MAX_BACKLOG, metrics=None,
+                 cache=None, batch_window_s=TRANSLATION_BATCH_WINDOW_S):
+        self.backend = backend
+        self.on_result = on_result
+        self.metrics = metrics
+        self.cache = cache
+        self.timeout_s = timeout_s
+        self.max_backlog = max_backlog
+        self.batch_window_s = batch_window_s
+        self._cond = threading.Condition()
+        self._pending = collections.deque()
+        self._next_job_id = 0
+        self._next_seq = {}       # speaker_id -> next sequence number to hand out
+        self._next_delivery = {}  # speaker_id -> next sequence number to deliver
+        self._finished = {}       # speaker_id -> {seq: (job_id, status, text)}
+        self._running = True
+        # Backend calls run on a fixed set of threads so a hung request can be abandoned after the
+        # timeout; while every one of them is stuck, further calls fail at once instead of piling up.
+        self._calls = queue.Queue()
+        self._call_slots = threading.BoundedSemaphore(max_workers)
+        self._workers = []
+        for i in range(max_workers):
+            # Daemon threads, so a call that never returns cannot keep the app from exiting.
+            threading.Thread(target=self._call_loop, name=f"translation-call-{i}", daemon=True).start()
+            worker = threading.Thread(target=self._worker_loop, name=f"translation-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, text, speaker_id, source_lang, target_lang):
+        """Queues a translation and returns its job id without blocking."""
+        cached = self.cache.get_memory(self.cache_key(text, source_lang, target_lang)) if self.cache else None
+        with self._cond:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            seq = self._next_seq.get(speaker_id, 0)
+            self._next_seq[speaker_id] = seq + 1
+            job = (job_id, speaker_id, seq, text, source_lang, target_lang, time.perf_counter())
+            if cached is not None:
+                if self.metrics:
+                    self.metrics.incr("translation_cache_hits")
+                self._finish_locked(job, "ok", cached)
+                return job_id
+            self._pending.append(job)
+            # A slow translator must not build an ever-growing backlog: drop the stalest requests.
+            while len(self._pending) > self.max_backlog:
+                stale = self._pending.popleft()
+                self._finish_locked(stale, "dropped", "")
+            self._cond.notify()
+        return job_id
+
+    def cache_key(self, text, source_lang, target_lang):
+        return (text, source_lang or "auto", target_lang, self.backend.name)
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._pending.clear()
+            self._cond.notify_all()
+        for _ in range(len(self._workers)):
+            self._calls.put(None)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                batch = self._take_batch_locked()
+            results = self._translate_batch(batch)
+            with self._cond:
+                if self._running:
+                    for job, (status, text) in zip(batch, results):
+                        self._finish_locked(job, status, text)
+
+    def _is_short(self, job):
+        return len(job[3]) <= TRANSLATION_BATCH_MAX_CHARS
+
+    def _take_batch_locked(self):
+        first = self._pending.popleft()
+        batch = [first]
+        if not self._is_short(first) or self.batch_window_s <= 0:
+            return batch
+        deadline = time.perf_counter() + self.batch_window_s
+        while self._running and len(batch) < TRANSLATION_BATCH_MAX_LINES:
+            match = next((job for job in self._pending
+                          if self._is_short(job) and job[4:6] == first[4:6]), None)
+            if match is not None:
+                self._pending.remove(match)
+                batch.append(match)
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining) # Releases the lock so submit() can add more lines
+        return batch
+
+    def _translate_batch(self, batch):
+        source_lang, target_lang = batch[0][4], batch[0][5]
+        results = [None] * len(batch)
+        misses = []
+        for i, job in enumerate(batch):
+            cached = self.cache.get(self.cache_key(job[3], source_lang, target_lang)) if self.cache else None
+            if cached is not None:
+                results[i] = ("ok", cached)
+                if self.metrics:
+                    self.metrics.incr("translation_cache_hits")
+            else:
+                misses.append(i)
+        if not misses:
+            return results
+
+        texts = [batch[i][3] for i in misses]
+        if self.metrics:
+            self.metrics.incr("translation_requests")
+        status, value = self._call_with_timeout(lambda: self.backend.translate_batch(texts, source_lang, target_lang))
+        translations, produced_by = value if status == "ok" else ([""] * len(misses), None)
+        for i, translation in zip(misses, translations):
+            results[i] = (status, translation)
+            # Fallback output is not cached under the primary backend's name.
+            if status == "ok" and self.cache and produced_by == self.backend.name:
+                self.cache.put(self.cache_key(batch[i][3], source_lang, target_lang), translation)
+        return results
+
+    def _call_with_timeout(self, fn):
+        if not self._call_slots.acquire(blocking=False):
+            print("Translation backend is not responding; skipping the request", file=sys.stderr)
+            return "timeout", None
+        future = concurrent.futures.Future()
+        future.add_done_callback(lambda _: self._call_slots.release()) # The slot stays taken while a hung call runs
+        self._calls.put((fn, future))
+        try:
+            return "ok", future.result(self.timeout_s)
+        except concurrent.futures.TimeoutError:
+            print(f"Translation timed out after {self.timeout_s:.1f}s", file=sys.stderr)
+            return "timeout", None
+        except Exception as e:
+            print(f"Translation Error: {e}", file=sys.stderr)
+            return "error", None
+
+    def _call_loop(self):
+        while True:
+            call = self._calls.get()
+            if call is None:
+                return
+            fn, future = call
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+    def _finish_locked(self, job, status, text):
+        job_id, speaker_id, seq, _, _, _, submitted_at = job
+        if self.metrics:
+            self.metrics.incr(f"translations_{status}")
+            if status == "ok":
+                self.metrics.observe("translation_s", time.perf_counter() - submitted_at) # Including queueing
+        self._finished.setdefault(speaker_id, {})[seq] = (job_id, status, text)
+        # Deliver every result that is now next in line for this speaker.
+        finished = self._finished[speaker_id]
+        next_seq = self._next_delivery.get(speaker_id, 0)
+        while next_seq in finished:
+            self.on_result(*finished.pop(next_seq))
+            next_seq += 1
+        self._next_delivery[speaker_id] = next_seq
+
+
+CaptionEvent = collections.namedtuple(
+    "CaptionEvent", ["kind", "text", "speaker_id", "unstable_text", "start_s", "end_s", "language", "details"],
+    defaults=("", None, "", None, None, None, None)
+)
+CaptionEvent.__doc__ = """Something the engine reports to its subscribers.
+
+kind is one of "caption" (a committed line), "partial" (streaming line in progress, `text` is
+the agreed part and `unstable_text` the rest), "skipped" (audio dropped to catch up, with the
+dropped span in `start_s`/`end_s`), "error", "model_ready", "model_error", "profile_changed" or
+"stopped". Times are seconds on the capture sample clock.
+"""
+
+
+class AudioChannel:
+    """One mono input of the engine, with its own ring buffer.
+
+    Sources deliver samples with `on_audio`. `speaker_id` is None for single-input capture, where
+    the speaker comes from the manual toggle or speaker identification instead. `language` is the
+    input's own language in the manual language cycle (None follows the spacebar toggle).
+    """
+
+    def __init__(self, source, speaker_id=None, sample_rate=AUDIO_SAMPLE_RATE):
+        self.source = source
+        self.speaker_id = speaker_id
+        self.language = None # Set by CaptionEngine.assign_channel_languages
+        self.audio_ring = AudioRingBuffer(sample_rate * AUDIO_RING_CAPACITY_S, sample_rate)
+        self.identified_speaker = None # Latest speaker identification result for this input
+        self.shedding = False # Too far behind real time; see CaptionEngine.update_backpressure
+        self.context_words = collections.deque(maxlen=PROMPT_CONTEXT_WORDS) # Prompt context for the next utterance
+
+    def on_audio(self, samples):
+        self.audio_ring.write(samples) # Runs on the audio callback: store only, metering reads the ring later
+
+    def exhausted(self, position):
+        """True once a finite source has ended and nothing past `position` is left to read."""
+        return self.source.finished and self.audio_ring.write_position <= position
+
+
+class LevelMeter:
+    """Input level in dBFS from the newest captured samples, measured when the UI asks for it.
+
+    Sources are anything with `latest(n)` (an AudioRingBuffer, an InferenceClient), and the
+    loudest one is reported, so the audio callback never does any metering work. `strip` is
+    "off", "waveform" (recent peak envelope) or "spectrum" (log-spaced bands of the window).
+    """
+
+    def __init__(self, strip=LEVEL_METER_STRIP, window_s=LEVEL_METER_WINDOW_S, strip_points=LEVEL_STRIP_POINTS, sample_rate=AUDIO_SAMPLE_RATE):
+        self.strip = strip
+        self.strip_points = strip_points
+        self.window_samples = int(window_s * sample_rate)
+        self.waveform_samples = int(LEVEL_STRIP_WAVEFORM_S * sample_rate)
+        self.taper = np.hanning(self.window_samples).astype(np.float32)
+        n_bins = self.window_samples // 2 + 1
+        edges = np.geomspace(LEVEL_STRIP_MIN_HZ, sample_rate / 2, strip_points + 1)[:-1]
+        # First FFT bin of each band; narrow low bands that share a bin just repeat it.
+        self.band_starts = np.minimum((edges * self.window_samples / sample_rate).astype(int), n_bins - 1)
+        self.reset()
+
+    def reset(self):
+        self.peak_hold_db = LEVEL_METER_FLOOR_DB
+        self.last_measured = time.monotonic()
+
+    def measure(self, sources):
+        """Returns `(rms_db, peak_hold_db, strip)`; strip values are 0..1, None when the strip is off."""
+        n = max(self.window_samples, self.waveform_samples if self.strip == "waveform" else 0)
+        loudest, loudest_power = None, -1.0
+        for source in sources:
+            samples = source.latest(n)
+            window = samples[-self.window_samples:]
+            power = float(np.dot(window, window)) / len(window) if len(window) else 0.0
+            if power > loudest_power:
+                loudest, loudest_power = samples, power
+        if loudest is None or len(loudest) == 0:
+            return LEVEL_METER_FLOOR_DB, LEVEL_METER_FLOOR_DB, None
+
+        window = loudest[-self.window_samples:]
+        rms_db = float(self.to_db(loudest_power, power=True))
+        now = time.monotonic()
+        self.peak_hold_db = max(float(self.to_db(np.max(np.abs(window)))),
+                                self.peak_hold_db - LEVEL_METER_PEAK_DECAY_DB_S * (now - self.last_measured))
+        self.last_measured = now
+
+        strip = None
+        if self.strip == "waveform":
+            # Right after a start there can be fewer samples than bars; the missing oldest ones are silence.
+            recent = np.pad(loudest, (max(0, self.strip_points - len(loudest)), 0))
+            usable = len(recent) - len(recent) % self.strip_points
+            envelope = np.abs(recent[len(recent) - usable:]).reshape(self.strip_points, -1).max(axis=1)
+            strip = self.fraction(self.to_db(envelope))
+        elif self.strip == "spectrum" and len(window) == self.window_samples:
+            spectrum = np.abs(np.fft.rfft(window * self.taper)) ** 2
+            bands = np.maximum.reduceat(spectrum, self.band_starts)
+            # Strongest bin per band, scaled so a full-scale sine reads about 0 dB.
+            strip = self.fraction(self.to_db(bands * 4 / np.sum(self.taper) ** 2, power=True))
+        return rms_db, self.peak_hold_db, strip
+
+    @staticmethod
+    def to_db(value, power=False):
+        """Amplitude (or power) in dBFS, clamped to the meter floor; scalars and arrays alike."""
+        return np.maximum((10 if power else 20) * np.log10(np.asarray(value, dtype=np.float64) + 1e-12), LEVEL_METER_FLOOR_DB)
+
+    @staticmethod
+    def fraction(level_db):
+        """Maps dBFS onto 0 (floor) .. 1 (full scale)."""
+        return np.clip(1 - np.asarray(level_db) / LEVEL_METER_FLOOR_DB, 0.0, 1.0)
+
+
+class DecodeScheduler:
+    """Shares the model between inputs: at most `slots` decodes run at once, and a free slot goes
+    to the waiting input that was served least recently. Inputs `register` while they transcribe,
+    so callers can tell whether anyone else may decode alongside them."""
+
+    def __init__(self, slots=1):
+        self.slots = slots
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._last_served = {} # key -> grant number
+        self._grants = 0
+        self._registered = set()
+
+    def register(self, key):
+        with self._cond:
+            self._registered.add(key)
+
+    def unregister(self, key):
+        with self._cond:
+            self._registered.discard(key)
+            self._last_served.pop(key, None)
+
+    def registered_count(self):
+        return len(self._registered)
+
+    def acquire(self, key):
+        with self._cond:
+            self._waiting.append(key)
+            while self._active >= self.slots or \
+                    min(self._waiting, key=lambda k: self._last_served.get(k, -1)) is not key:
+                self._cond.wait()
+            self._waiting.remove(key)
+            self._active += 1
+            self._grants += 1
+            self._last_served[key] = self._grants
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+
+class DecodeRequest:
+    """Utterances one caller handed to a `DecodeBatcher`, and their results once decoded."""
+
+    __slots__ = ("audios", "prompt", "results", "error", "done", "submitted", "started", "batch_size")
+
+    def __init__(self, audios, prompt=None):
+        self.audios = audios
+        self.prompt = prompt # initial_prompt token ids, used when the request is decoded on its own
+        self.results = None # [(segments, info, decode_s)] per audio; decode_s is its share of the batch
+        self.error = None
+        self.done = threading.Event()
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.batch_size = 0
+
+
+class DecodeBatcher:
+    """Decodes utterances from several callers as one batched Whisper call.
+
+    The first caller of a batch leads it: it waits up to `window_s` for others with the same
+    model, language and options to join, then for a `DecodeScheduler` slot (anyone arriving in the
+    meantime rides along too), and runs the whole batch through `BatchedInferencePipeline` with
+    each utterance as a clip. Results are handed back to each caller in order. A batch of one is
+    an ordinary `model.transcribe` with the caller's own prompt; a shared batch can only take
+    one prompt for all clips, so it relies on the `hotwords` option instead.
+    """
+
+    def __init__(self, max_batch=DECODE_BATCH_MAX):
+        self.max_batch = max_batch
+        self._cond = threading.Condition()
+        self._open = {} # (model, language, options) -> batch still taking requests
+
+    def decode(self, model, scheduler, key, audios, language, options, window_s=0.0, share=True, prompt=None):
+        """Decodes `audios` with `model`; returns the finished `DecodeRequest`.
+
+        `key` is the caller's `scheduler` key. Requests without a `language` never share a batch:
+        the batched pipeline would detect one language for all of them.
+        """
+        request = DecodeRequest(audios, prompt)
+        group = (model, language, repr(sorted(options.items()))) if share and language is not None else None
+        with self._cond:
+            batch = self._open.get(group) if group else None
+            if batch is not None and self._clip_count(batch) + len(audios) <= self.max_batch:
+                batch.append(request)
+                self._cond.notify_all()
+                leader = False
+            else:
+                batch = [request]
+                if group:
+                    self._open[group] = batch
+                leader = True
+        if not leader:
+            request.done.wait()
+            if request.error:
+                raise request.error
+            return request
+
+        if group and window_s > 0:
+            deadline = time.monotonic() + window_s
+            with self._cond:
+                while self._clip_count(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+        scheduler.acquire(key)
+        try:
+            with self._cond:
+                if self._open.get(group) is batch:
+                    del self._open[group]
+            clips = [audio for member in batch for audio in member.audios]
+            started = time.perf_counter()
+            try:
+                results, error = self.run_batch(model, clips, language, options, batch[0].prompt if len(batch) == 1 else None), None
+            except Exception as e:
+                results, error = None, e
+            decode_s = time.perf_counter() - started
+        finally:
+            scheduler.release()
+
+        total_samples = sum(len(audio) for audio in clips) or 1
+        first = 0
+        for member in batch:
+            member.started = started
+            member.batch_size = len(clips)
+            member.error = error
+            if error is None:
+                member.results = [(segments, info, decode_s * len(audio) / total_samples)
+                                  for (segments, info), audio in zip(results[first:first + len(member.audios)], member.audios)]
+            first += len(member.audios)
+            member.done.set()
+        if error:
+            raise error
+        return request
+
+    def _clip_count(self, batch):
+        return sum(len(member.audios) for member in batch)
+
+    def run_batch(self, model, clips, language, options, prompt=None):
+        """Returns `(segments, info)` per clip, segment times relative to the clip's own start."""
+        if len(clips) == 1:
+            if prompt:
+                # The prompt tokens already start with the glossary, so it is not encoded again as hotwords.
+                options = {k: v for k, v in options.items() if k != "hotwords"}
+                options["initial_prompt"] = prompt
+            segments, info = model.transcribe(clips[0], language=language, **options)
+            return [(list(segments), info)] # Segments decode lazily while iterated
+        offsets_s, position = [], 0
+        for audio in clips:
+            offsets_s.append(position / AUDIO_SAMPLE_RATE)
+            position += len(audio)
+        clip_timestamps = [{"start": offset_s, "end": offset_s + len(audio) / AUDIO_SAMPLE_RATE}
+                           for offset_s, audio in zip(offsets_s, clips)]
+        # The clips are already-segmented speech, so they replace the VAD pass.
+        batch_options = {k: v for k, v in options.items() if k not in ("vad_filter", "vad_parameters")}
+        segments, info = BatchedInferencePipeline(model).transcribe(
+            np.concatenate(clips), language=language, clip_timestamps=clip_timestamps,
+            batch_size=len(clips), **batch_options)
+
+        per_clip = [[] for _ in clips]
+        for segment in segments:
+            i = max(0, bisect.bisect_right(offsets_s, segment.start + 0.001) - 1) # Segment times are rounded to ms
+            offset_s = offsets_s[i]
+            words = segment.words and [dataclasses.replace(word, start=max(0.0, word.start - offset_s), end=max(0.0, word.end - offset_s))
+                                       for word in segment.words]
+            per_clip[i].append(dataclasses.replace(segment, start=max(0.0, segment.start - offset_s),
+                                                   end=max(0.0, segment.end - offset_s), words=words))
+        return [(clip_segments, info) for clip_segments in per_clip]
+
+
+class SoundDeviceSource:
+    """Live capture from a PortAudio input device; each of its `channels` is a separate input."""
+
+    def __init__(self, device_id, channels=1, sample_rate=AUDIO_SAMPLE_RATE):
+        self.device_id = device_id
+        self.channel_count = channels
+        self.sample_rate = sample_rate
+        self.realtime = True # Paced by the sound card, so the engine can fall behind it
+        self.finished = False # Live input never runs out
+        self.stream = None
+
+    def start(self, channels):
+        if sd is None:
+            raise RuntimeError("sounddevice/PortAudio is not available on this system")
+
+        def audio_callback(indata, frames, time, status):
+            if status:
+                print("Audio callback status:", status, file=sys.stderr) 
+            for i, channel in enumerate(channels):
+                channel.on_audio(indata[:, i])
+
+        self.stream = sd.InputStream(
+            device=self.device_id, channels=self.channel_count, samplerate=self.sample_rate, 
+            callback=audio_callback, dtype='float32' 
+        )
+        try:
+            self.stream.start()
+        except Exception:
+            self.stream.close()
+            self.stream = None
+            raise
+
+    def stop(self):
+        if self.stream and not self.stream.closed:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception as e:
+                print(f"Error stopping audio stream: {e}", file=sys.stderr)
+        self.stream = None
+
+
+class ArraySource:
+    """Replays a mono float32 array, paced like a live device or as fast as the engine reads it."""
+    channel_count = 1
+
+    def __init__(self, samples, realtime=True, block_s=0.02, sample_rate=AUDIO_SAMPLE_RATE):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.realtime = realtime
+        self.block_samples = max(1, int(sample_rate * block_s))
+        self.sample_rate = sample_rate
+        self.finished = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, channels):
+        self.finished = False
+        self.start_time = time.perf_counter() # Wall time of sample 0, for latency measurements
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._replay, args=(channels[0],), name="array-source", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _replay(self, channel):
+        start_time = self.start_time
+        try:
+            for position in range(0, len(self.samples), self.block_samples):
+                block = self.samples[position:position + self.block_samples]
+                if self.realtime:
+                    # Deliver each block when a sound card would have, without drifting.
+                    delay = start_time + (position + len(block)) / self.sample_rate - time.perf_counter()
+                    if delay > 0 and self._stop_event.wait(delay):
+                        return
+                else:
+                    # At max speed, wait for the reader instead of overrunning the ring buffer.
+                    while not channel.audio_ring.wait_for_space(len(block), timeout=0.1):
+                        if self._stop_event.is_set():
+                            return
+                if self._stop_event.is_set():
+                    return
+                channel.on_audio(block)
+        finally:
+            self.finished = True
+
+
+class WavFileSource(ArraySource):
+    """Replays an audio file (WAV, FLAC, ...) resampled to the capture rate."""
+
+    def __init__(self, path, realtime=True, block_s=0.02, sample_rate=AUDIO_SAMPLE_RATE):
+        super().__init__(decode_audio(path, sampling_rate=sample_rate), realtime, block_s, sample_rate)
+        self.path = path
+
+
+class SyntheticSource(ArraySource):
+    """Deterministic test signal: background noise with voiced tone bursts in `speech_intervals`."""
+
+    def __init__(self, duration_s, speech_intervals=((1.0, 3.0),), seed=0, realtime=False,
+                 block_s=0.02, sample_rate=AUDIO_SAMPLE_RATE):
+        rng = np.random.default_rng(seed)
+        samples = rng.standard_normal(int(duration_s * sample_rate)).astype(np.float32) * 0.002
+        for start_s, end_s in speech_intervals:
+            start, end = int(start_s * sample_rate), min(int(end_s * sample_rate), len(samples))
+            t = np.arange(end - start, dtype=np.float32) / sample_rate
+            # A 150 Hz "voice" with a few harmonics and a syllable-rate envelope.
+            voice = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 5))
+            samples[start:end] += (0.15 * voice * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))).astype(np.float32)
+        super().__init__(samples, realtime, block_s, sample_rate)
+
+
+class CaptionEngine:
+    """UI-free capture → segmentation → Whisper pipeline.
+
+    Audio comes from one or more pluggable sources (`SoundDeviceSource`, `WavFileSource`,
+    `ArraySource`, `SyntheticSource`); each input channel gets its own buffer, segmenter and
+    transcription thread, and all of them share the model through a `DecodeScheduler`, with
+    concurrent utterances batched by a `DecodeBatcher`. Results are published as `CaptionEvent`s to callbacks registered with
+    `subscribe` (called on engine threads, so they must be quick), or read with `events()`.
+    """
+
+    def __init__(self, model_registry=None, decode_scheduler=None, decode_batcher=None):
+        self.channels = []
+        self.owns_decode_scheduler = decode_scheduler is None # A shared scheduler keeps its own slot count
+        self.decode_scheduler = decode_scheduler or DecodeScheduler()
+        self.decode_batcher = decode_batcher or DecodeBatcher()
+        self.model_registry = model_registry or ModelRegistry()
+        self.model = None
+        self.model_size = None
+        self.requested_model_size = None # Model size of the latest request
+        self.model_request_time = None
+
+        self.streaming_mode = False # Low-latency sliding-window decoding with partial captions
+        self.decode_profile_name = DEFAULT_DECODE_PROFILE
+        self.auto_tune = False
+        self.auto_tuner = DecodeAutoTuner(self.decode_profile_name)
+        self.backpressure_policy = BACKPRESSURE_POLICY
+        self.backpressure_restore_model = None # Model to return to once "smaller_model" shedding ends
+
+        self.active_speaker = 1
+        self.identify_speakers = False # Attribute single-input captions by voice instead of the toggle
+        self.speaker_embedder = SpeakerEmbedder()
+        self.speaker_clusterer = SpeakerClusterer()
+        self.settings_language = "en" # None means auto-detect
+        self.language_cycle = ["en", "es"]
+        self.language_cycle_idx = 0
+        self.language_tracker = LanguageTracker() # Per-speaker languages for Auto-Detect
+        self.glossary = None # Session vocabulary for prompting and post-correction
+        self.prompt_cache = PromptCache()
+
+        self.metrics = PipelineMetrics()
+        self.metrics.register_gauge("audio", self.audio_stats) # Lag (queue depth), max lag, dropped samples
+        self.metrics.register_gauge("samples_buffered", lambda: sum(channel.audio_ring.available() for channel in self.channels))
+        self.is_running = False
+        self.sources = []
+        self.thread = None
+        self.subscribers = []
+
+    # --- Events ---
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def emit(self, kind, **fields):
+        event = CaptionEvent(kind, **fields)
+        self.metrics.incr(f"events_{kind}")
+        for callback in list(self.subscribers):
+            callback(event)
+
+    def events(self, timeout=None):
+        """Returns an iterator over events until the engine stops.
+
+        Subscribes immediately, so call it before `start` to see every event. The iterator raises
+        queue.Empty if no event arrives within `timeout`.
+        """
+        event_queue = queue.Queue()
+        self.subscribe(event_queue.put)
+
+        def iterate():
+            try:
+                while True:
+                    event = event_queue.get(timeout=timeout)
+                    yield event
+                    if event.kind == "stopped":
+                        return
+            finally:
+                self.unsubscribe(event_queue.put)
+
+        return iterate()
+
+    # --- Models and decode profiles ---
+
+    def request_model(self, model_size):
+        """Switches to `model_size` in the background; a "model_ready" or "model_error" event follows."""
+        self.requested_model_size = model_size
+        self.model_request_time = time.perf_counter()
+        self.model_registry.load_async(model_size, self.on_model_loaded, device="cpu", **DECODE_MODEL_OPTIONS)
+
+    def load_model(self, model_size):
+        """Blocking model load for headless use."""
+        load_start = time.perf_counter()
+        self.model = self.model_registry.load(model_size, device="cpu", **DECODE_MODEL_OPTIONS)
+        self.metrics.record_startup("model_load_s", time.perf_counter() - load_start)
+        self.model_size = model_size
+        self.requested_model_size = model_size
+        return self.model
+
+    def on_model_loaded(self, model_size, model, load_s, error):
+        if model_size != self.requested_model_size: # A newer selection superseded this load
+            return
+        if error is not None:
+            self.emit("model_error", text=str(error), details={"model_size": model_size})
+            return
+        self.model = model # The transcription thread picks this up at the next utterance
+        self.model_size = model_size
+        switch_s = time.perf_counter() - self.model_request_time
+        if load_s:
+            self.metrics.record_startup("model_load_s", load_s)
+        self.metrics.record_startup("model_switch_s", switch_s)
+        self.emit("model_ready", text=model_size, details={"profile": self.decode_profile_name, "load_s": load_s, "switch_s": switch_s})
+
+    def set_decode_profile(self, profile_name):
+        """Makes `profile_name` active; it applies from the next decode with the same model."""
+        self.decode_profile_name = profile_name
+        self.emit("profile_changed", text=profile_name)
+
+    def set_auto_tune(self, enabled):
+        self.auto_tune = enabled
+        if not enabled and self.decode_profile_name != self.auto_tuner.ceiling:
+            self.set_decode_profile(self.auto_tuner.ceiling) # Back to what the user picked
+        self.auto_tuner.set_ceiling(self.auto_tuner.ceiling)
+
+    # --- Speaker and language state ---
+
+    def toggle_speaker(self):
+        """The spacebar action: next language in the cycle and the other speaker."""
+        self.language_cycle_idx = (self.language_cycle_idx + 1) % len(self.language_cycle)
+        self.active_speaker = 2 if self.active_speaker == 1 else 1
+
+    def set_settings_language(self, language):
+        if language is None and self.settings_language is not None:
+            self.language_tracker.reset() # Re-detect everyone when switching to Auto-Detect
+        self.settings_language = language
+        if language in self.language_cycle:
+            self.language_cycle_idx = self.language_cycle.index(language)
+        self.assign_channel_languages()
+
+    def assign_channel_languages(self):
+        """Gives each speaker's input its own language of the cycle, paired the way the spacebar
+        pairs them: the active speaker has the current language, the other speaker the next one."""
+        for channel in self.channels:
+            if channel.speaker_id is not None:
+                offset = channel.speaker_id - self.active_speaker
+                channel.language = self.language_cycle[(self.language_cycle_idx + offset) % len(self.language_cycle)]
+
+    def cycle_language(self):
+        return self.language_cycle[self.language_cycle_idx]
+
+    def translation_languages(self, language=None):
+        """(source, target) for translating a caption.
+
+        Pass the caption's `language` (detected, or its input's own language) to translate from it
+        into the other language of the cycle; without one, the current cycle language is used.
+        """
+        if language:
+            return language, next((lang for lang in self.language_cycle if lang != language), self.language_cycle[0])
+        target_idx = (self.language_cycle_idx + 1) % len(self.language_cycle)
+        return self.cycle_language(), self.language_cycle[target_idx]
+
+    def settings(self):
+        """The user-facing state a remote engine needs, as plain JSON-able values."""
+        return {"decode_profile_name": self.auto_tuner.ceiling, "auto_tune": self.auto_tune, "streaming_mode": self.streaming_mode,
+                "active_speaker": self.active_speaker, "settings_language": self.settings_language,
+                "language_cycle_idx": self.language_cycle_idx, "identify_speakers": self.identify_speakers,
+                "backpressure_policy": self.backpressure_policy,
+                "glossary_terms": self.glossary.terms if self.glossary else []}
+
+    def apply_settings(self, settings):
+        if "identify_speakers" in settings:
+            self.set_identify_speakers(settings["identify_speakers"])
+        if "settings_language" in settings:
+            self.set_settings_language(settings["settings_language"])
+        if "glossary_terms" in settings:
+            self.set_glossary(Glossary(settings["glossary_terms"]) if settings["glossary_terms"] else None)
+        # The profile the user picked; unchanged, it leaves an auto-tuner step-down in place.
+        if settings.get("decode_profile_name", self.auto_tuner.ceiling) != self.auto_tuner.ceiling:
+            self.auto_tuner.set_ceiling(settings["decode_profile_name"])
+            self.set_decode_profile(settings["decode_profile_name"])
+        if settings.get("auto_tune", self.auto_tune) != self.auto_tune:
+            self.set_auto_tune(settings["auto_tune"])
+        for name in ("streaming_mode", "active_speaker", "language_cycle_idx", "backpressure_policy"):
+            if name in settings:
+                setattr(self, name, settings[name])
+        self.assign_channel_languages()
+
+    def get_effective_transcription_language(self, channel=None):
+        transcription_language = channel.language if channel is not None and channel.language else self.cycle_language()
+        effective_transcription_language = transcription_language
+        if self.settings_language is not None and \
+           self.settings_language not in self.language_cycle:
+            effective_transcription_language = self.settings_language
+        elif self.settings_language is None: 
+             effective_transcription_language = None
+        return effective_transcription_language
+
+    # --- Capture ---
+
+    def start(self, sources):
+        """Starts capturing from one source (or a list of them) and transcribing on background threads.
+
+        With more than one input channel in total, channel i is attributed to speaker i + 1;
+        a single input follows the manually toggled `active_speaker`.
+        """
+        if self.is_running:
+            raise RuntimeError("Caption engine is already running")
+        if self.model is None:
+            raise RuntimeError("No Whisper model loaded yet")
+        sources = list(sources) if isinstance(sources, (list, tuple)) else [sources]
+        multi_input = sum(source.channel_count for source in sources) > 1
+        self.metrics.reset()
+        self.channels = []
+        started = []
+        try:
+            for source in sources:
+                source_channels = [AudioChannel(source, len(self.channels) + i + 1 if multi_input else None)
+                                   for i in range(source.channel_count)]
+                self.channels.extend(source_channels)
+                source.start(source_channels) # Raises if the device cannot be opened
+                started.append(source)
+        except Exception:
+            for source in started:
+                source.stop()
+            raise
+        self.sources = sources
+        self.assign_channel_languages()
+        if self.owns_decode_scheduler:
+            self.decode_scheduler.slots = DECODE_MODEL_OPTIONS["num_workers"]
+        self.is_running = True
+        self.thread = threading.Thread(target=self.transcribe_loop_threaded, name="caption-engine", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Asks the transcription threads to finish; a "stopped" event follows."""
+        self.is_running = False
+
+    def join(self, timeout=None):
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def audio_rings(self):
+        return [channel.audio_ring for channel in self.channels]
+
+    def audio_stats(self):
+        """Ring buffer stats over all inputs: the worst lag and the total of dropped samples."""
+        stats = [channel.audio_ring.stats() for channel in self.channels]
+        return {"lag_s": max((st["lag_s"] for st in stats), default=0.0),
+                "max_lag_s": max((st["max_lag_s"] for st in stats), default=0.0),
+                "dropped_samples": sum(st["dropped_samples"] for st in stats)}
+
+    def set_glossary(self, glossary):
+        self.glossary = glossary
+
+    def correct_text(self, text):
+        """Applies the glossary's near-miss corrections to caption text."""
+        if self.glossary is None or not text:
+            return text
+        text, corrections = self.glossary.correct(text)
+        if corrections:
+            self.metrics.incr("glossary_corrections", corrections)
+        return text
+
+    def set_identify_speakers(self, enabled):
+        if enabled and not self.identify_speakers:
+            self.speaker_clusterer.reset()
+        self.identify_speakers = enabled
+
+    def speaker_for(self, channel):
+        if channel.speaker_id is not None:
+            return channel.speaker_id
+        if self.identify_speakers and channel.identified_speaker is not None:
+            return channel.identified_speaker
+        return self.active_speaker
+
+    def identify_speaker(self, channel, audio_np):
+        """Attributes `channel`'s current speech to a voice, for inputs that don't imply a speaker,
+        and returns the speaker it belongs to."""
+        if channel.speaker_id is not None or not self.identify_speakers:
+            return self.speaker_for(channel)
+        start = time.perf_counter()
+        embedding = self.speaker_embedder.embed(audio_np)
+        if embedding is not None:
+            channel.identified_speaker = self.speaker_clusterer.assign(embedding) + 1
+        self.metrics.observe("identify_speaker_s", time.perf_counter() - start)
+        return self.speaker_for(channel)
+
+    # --- Transcription thread ---
+
+    def run_transcribe(self, channel, audio_np, realtime_s, context_words=None, identify=False, **options):
+        """Runs one decode for `channel` with the active profile and feeds its timing to the auto-tuner.
+
+        `realtime_s` is how much audio time the decode has to keep up with; `options` override
+        the profile's transcribe arguments. The prompt holds the glossary and `context_words`
+        (by default the channel's recent caption words, if the profile conditions on previous
+        text). With `identify`, the speaker is identified from `audio_np` before their language
+        is picked.
+        """
+        segments, info, _ = self.run_transcribe_many(channel, [(audio_np, realtime_s)], context_words, identify, **options)[0]
+        return segments, info
+
+    def run_transcribe_many(self, channel, clips, context_words=None, identify=False, **options):
+        """Like `run_transcribe` for a list of `(audio_np, realtime_s)` clips, decoded as one batch
+        (shared with other inputs' utterances when they arrive together). Returns `(segments, info, speaker_id)` per clip."""
+        speakers = [self.identify_speaker(channel, audio_np) if identify else self.speaker_for(channel) for audio_np, _ in clips]
+        if len(set(speakers)) == 1:
+            return self.decode_clips(channel, speakers[0], clips, context_words, options)
+        # Different voices may speak different languages: each speaker's clips are decoded as their own batch.
+        results = [None] * len(clips)
+        for speaker in dict.fromkeys(speakers):
+            indices = [i for i, clip_speaker in enumerate(speakers) if clip_speaker == speaker]
+            for i, result in zip(indices, self.decode_clips(channel, speaker, [clips[i] for i in indices], context_words, options)):
+                results[i] = result
+        return results
+
+    def decode_clips(self, channel, speaker, clips, context_words, options):
+        """Decodes `speaker`'s clips of `channel` in that speaker's language; see `run_transcribe_many`."""
+        decode_options = dict(DECODE_PROFILES[self.decode_profile_name])
+        decode_options.update(options)
+        if self.glossary is not None and self.glossary.terms:
+            decode_options["hotwords"] = self.glossary.hotwords
+        if context_words is None:
+            # Earlier captions only prompt profiles that condition on previous text, so without a
+            # glossary the realtime and balanced profiles decode exactly as they would unprompted.
+            context_words = channel.context_words if decode_options.get("condition_on_previous_text") else ()
+        prompt = self.prompt_cache.prompt(self.model, self.glossary, context_words)
+        language = self.get_effective_transcription_language(channel)
+        if language is None: # Auto-Detect: reuse the speaker's known language when there is one
+            language = self.language_tracker.language_for(speaker)
+            detecting = language is None
+        else:
+            detecting = False
+        if detecting and len(clips) > 1: # Detect on the first clip alone, then batch the rest in that language
+            return self.decode_clips(channel, speaker, clips[:1], context_words, options) + \
+                self.decode_clips(channel, speaker, clips[1:], context_words, options)
+
+        # Waiting for company only pays off when other inputs (or server clients) decode alongside.
+        window_s = DECODE_BATCH_WINDOW_S if self.decode_scheduler.registered_count() > 1 else 0.0
+        request = self.decode_batcher.decode(self.model, self.decode_scheduler, channel, [audio_np for audio_np, _ in clips],
+                                             language, decode_options, window_s, share=not self.streaming_mode, prompt=prompt)
+        self.metrics.observe("decode_wait_s", request.started - request.submitted)
+        self.metrics.observe("decode_batch_size", request.batch_size)
+        results = []
+        for (audio_np, realtime_s), (segments, info, decode_s) in zip(clips, request.results):
+            if detecting:
+                self.metrics.incr("language_detections")
+                self.language_tracker.observe_detection(speaker, info.language, info.language_probability)
+            elif self.settings_language is None:
+                self.language_tracker.observe_decode(speaker, segments)
+            audio_s = len(audio_np) / AUDIO_SAMPLE_RATE
+            self.metrics.incr("decode_calls")
+            self.metrics.incr("decode_s_total", decode_s)
+            self.metrics.incr("decoded_audio_s_total", audio_s)
+            self.metrics.observe("transcribe_s", decode_s)
+            self.metrics.observe("transcribe_rtf", decode_s / realtime_s if realtime_s else 0.0)
+
+            if self.auto_tune:
+                # Buffered replay audio is not lag: only a live input can fall behind.
+                lag_s = self.audio_stats()["lag_s"] if channel.source.realtime else 0.0
+                new_profile = self.auto_tuner.record(realtime_s, decode_s, lag_s)
+                if new_profile:
+                    print(f"Auto-tuner switching decode profile to '{new_profile}'")
+                    self.set_decode_profile(new_profile)
+            results.append((segments, info, speaker))
+        return results
+
+    def transcribe_loop_threaded(self):
+        if len(self.channels) == 1:
+            self.transcribe_channel(self.channels[0])
+        else:
+            workers = [threading.Thread(target=self.transcribe_channel, args=(channel,), name=f"caption-channel-{i}", daemon=True)
+                       for i, channel in enumerate(self.channels)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        self.is_running = False
+        for source in self.sources:
+            source.stop()
+        ring_stats = self.audio_stats()
+        print(f"Audio buffer: dropped {ring_stats['dropped_samples']} samples, max lag {ring_stats['max_lag_s']:.1f}s")
+        print("Transcription loop has ended.")
+        self.emit("stopped", details=ring_stats)
+
+    # --- Backpressure ---
+
+    def update_backpressure(self, channel, lag_s):
+        """Starts or stops load shedding for `channel` from its current lag.
+
+        `lag_s` is how long ago the newest audio a decode is about to cover was captured. Shedding
+        starts above BACKPRESSURE_MAX_LAG_S and stops below
+        BACKPRESSURE_TARGET_LAG_S. Meanwhile `backpressure_policy` decides what is given up:
+        "skip_silence" skips short utterances, "shorten_windows" decodes less per step
+        (lighter search in utterance mode, shorter and sparser windows in streaming mode),
+        "smaller_model" switches to the next smaller model until the lag is gone, and
+        "drop_oldest" drops audio down to the target lag.
+
+        Non-realtime sources (replay at max speed) wait for the engine instead, so they never shed.
+        """
+        if not channel.source.realtime:
+            return
+        if not channel.shedding and lag_s > BACKPRESSURE_MAX_LAG_S:
+            channel.shedding = True
+            self.metrics.incr("backpressure_events")
+            print(f"Falling behind by {lag_s:.1f}s; shedding load ({self.backpressure_policy})", file=sys.stderr)
+            if self.backpressure_policy == "smaller_model" and self.backpressure_restore_model is None:
+                smaller = BACKPRESSURE_SMALLER_MODEL.get(self.model_size)
+                if smaller:
+                    self.backpressure_restore_model = self.model_size
+                    self.request_model(smaller) # Instant if it is still resident
+        elif channel.shedding and lag_s <= BACKPRESSURE_TARGET_LAG_S:
+            channel.shedding = False
+            print(f"Caught up (lag {lag_s:.1f}s)", file=sys.stderr)
+            if self.backpressure_restore_model and not any(c.shedding for c in self.channels):
+                self.request_model(self.backpressure_restore_model)
+                self.backpressure_restore_model = None
+
+    def must_drop_audio(self, channel, lag_s):
+        if not channel.source.realtime:
+            return False
+        return lag_s > BACKPRESSURE_HARD_LAG_S or (channel.shedding and self.backpressure_policy == "drop_oldest")
+
+    def shedding_with(self, channel, policy):
+        return channel.shedding and self.backpressure_policy == policy
+
+    def skip_audio(self, channel, start_pos, end_pos):
+        """Drops `channel` audio up to `end_pos` and reports the gap with a visible marker."""
+        channel.audio_ring.discard_until(end_pos)
+        if end_pos > start_pos:
+            skipped_s = (end_pos - start_pos) / AUDIO_SAMPLE_RATE
+            self.metrics.incr("audio_skipped_s", skipped_s)
+            self.emit("skipped", text=SKIPPED_AUDIO_MARKER, speaker_id=self.speaker_for(channel),
+                      start_s=start_pos / AUDIO_SAMPLE_RATE, end_s=end_pos / AUDIO_SAMPLE_RATE, details={"skipped_s": skipped_s})
+
+    def transcribe_channel(self, channel):
+        self.decode_scheduler.register(channel)
+        try:
+            if self.streaming_mode:
+                self.transcribe_streaming(channel)
+            else:
+                self.transcribe_utterances(channel)
+        except Exception as e:
+            error_message = f"Transcription error: {str(e)[:100]}" 
+            print(error_message, file=sys.stderr)
+            self.emit("error", text=error_message, speaker_id=self.speaker_for(channel))
+        finally:
+            self.decode_scheduler.unregister(channel)
+
+    def scan_for_speech(self, channel, segmenter):
+        """Runs the segmenter over newly captured audio; returns the utterances that ended."""
+        audio_ring = channel.audio_ring
+        if segmenter.position < audio_ring.read_position: # Unscanned audio was overrun
+            segmenter.reset(audio_ring.read_position)
+        n = audio_ring.write_position - segmenter.position
+        scan_start, samples = audio_ring.peek(n - n % segmenter.frame_samples, segmenter.position)
+        if scan_start != segmenter.position:
+            segmenter.reset(scan_start)
+        return segmenter.feed(samples)
+
+    def transcribe_utterances(self, channel):
+        """Decodes only the speech the segmenter finds; silent audio is dropped without waking the model."""
+        audio_ring = channel.audio_ring
+        segmenter = UtteranceSegmenter()
+        segmenter.reset(audio_ring.read_position)
+        scan_samples = int(AUDIO_SAMPLE_RATE * VAD_SCAN_INTERVAL_S)
+        pending = collections.deque()
+
+        while self.is_running:
+            if not pending:
+                if not audio_ring.wait_until(segmenter.position + scan_samples, timeout=0.1):
+                    if channel.exhausted(segmenter.position + scan_samples - 1):
+                        break
+                    continue
+                pending.extend(self.scan_for_speech(channel, segmenter))
+                audio_ring.discard_until(pending[0][0] if pending else segmenter.release_position)
+                if not pending:
+                    continue
+            else: # Pick up utterances that ended while the last batch was decoding
+                pending.extend(self.scan_for_speech(channel, segmenter))
+
+            lag_s = (audio_ring.write_position - pending[0][1]) / AUDIO_SAMPLE_RATE
+            self.update_backpressure(channel, lag_s)
+            if self.must_drop_audio(channel, lag_s):
+                cut = audio_ring.write_position - int(BACKPRESSURE_TARGET_LAG_S * AUDIO_SAMPLE_RATE)
+                skipped_start = audio_ring.read_position
+                while pending and pending[0][0] < cut:
+                    pending.popleft()
+                self.skip_audio(channel, skipped_start, pending[0][0] if pending else min(cut, segmenter.release_position))
+                continue
+            # A backlog (after a stall, or a burst of short utterances) is decoded as one batch.
+            utterances = []
+            while pending and len(utterances) < DECODE_BATCH_MAX:
+                start_pos, end_pos = pending.popleft()
+                if self.shedding_with(channel, "skip_silence") and end_pos - start_pos < BACKPRESSURE_MIN_UTTERANCE_S * AUDIO_SAMPLE_RATE:
+                    self.metrics.incr("utterances_shed")
+                    continue
+                utterances.append((start_pos, end_pos))
+            if utterances:
+                self.decode_utterances(channel, utterances)
+
+        # Don't lose the words spoken right before Stop (or the end of a file).
+        pending.extend(self.scan_for_speech(channel, segmenter))
+        pending.extend(segmenter.flush())
+        while pending:
+            self.decode_utterances(channel, [pending.popleft() for _ in range(min(len(pending), DECODE_BATCH_MAX))])
+
+    def decode_utterances(self, channel, utterances):
+        """Decodes consecutive `(start_pos, end_pos)` utterances of `channel` together and emits their captions in order."""
+        audio_ring = channel.audio_ring
+        audio_ring.discard_until(utterances[0][0])
+        clips = []
+        for start_pos, end_pos in utterances:
+            window_start, audio_np = audio_ring.peek(end_pos - start_pos, start_pos)
+            if window_start != start_pos:
+                print("Audio overrun before decoding; skipping the affected utterance.", file=sys.stderr)
+                self.metrics.incr("audio_overruns")
+                continue
+            # A peeked window is only valid until the next peek, so batched utterances are copied out.
+            clips.append((start_pos, end_pos, audio_np.copy() if len(utterances) > 1 else audio_np))
+        if not clips:
+            return
+
+        light_options = dict(beam_size=1, best_of=1) if self.shedding_with(channel, "shorten_windows") else {}
+        results = self.run_transcribe_many(channel, [(audio_np, len(audio_np) / AUDIO_SAMPLE_RATE) for _, _, audio_np in clips],
+                                           identify=True,
+                                           vad_filter=True, 
+                                           vad_parameters=dict(min_silence_duration_ms=500),
+                                           **light_options
+                                           )
+        for (start_pos, end_pos, audio_np), (segments, info, speaker) in zip(clips, results):
+            transcribed_text = self.correct_text("".join(segment.text + " " for segment in segments).strip())
+            audio_ring.discard_until(start_pos)
+            if not audio_ring.release(start_pos, end_pos - start_pos):
+                print("Audio overrun while decoding; discarding the affected utterance.", file=sys.stderr)
+                self.metrics.incr("audio_overruns")
+                continue
+            if transcribed_text: 
+                channel.context_words.extend(transcribed_text.split())
+                self.emit("caption", text=transcribed_text, speaker_id=speaker, language=info.language,
+                          start_s=start_pos / AUDIO_SAMPLE_RATE, end_s=end_pos / AUDIO_SAMPLE_RATE)
+
+    def transcribe_streaming(self, channel):
+        """Re-decodes a sliding window every STREAMING_STEP_S and commits words two decodes agree on."""
+        sample_rate = AUDIO_SAMPLE_RATE
+        step_samples = int(sample_rate * STREAMING_STEP_S)
+        max_window_samples = int(sample_rate * STREAMING_MAX_WINDOW_S)
+        agreement = LocalAgreementBuffer()
+        audio_ring = channel.audio_ring
+        segmenter = UtteranceSegmenter()
+        segmenter.reset(audio_ring.read_position)
+        line_words = []     # Committed words not yet emitted as a caption line
+        decoded_samples = 0 # Window length (from the commit point) at the last decode
+        ended = collections.deque() # Utterances the segmenter closed whose audio is not released yet
+        language = None
+
+        while self.is_running:
+            # Under "shorten_windows" shedding, decode half as often over at most half the audio.
+            shorten = self.shedding_with(channel, "shorten_windows")
+            step = step_samples * 2 if shorten else step_samples
+            window_limit = max_window_samples // 2 if shorten else max_window_samples
+            if not audio_ring.wait_for(decoded_samples + step, timeout=0.1):
+                if channel.exhausted(audio_ring.read_position + decoded_samples + step - 1):
+                    break
+                continue
+
+            lag_s = (audio_ring.available() - decoded_samples) / sample_rate # Audio no decode has seen yet
+            self.update_backpressure(channel, lag_s)
+            if self.must_drop_audio(channel, lag_s):
+                # Give up the hypothesis and the oldest audio; the segmenter resyncs on its next scan.
+                self.skip_audio(channel, audio_ring.read_position,
+                                audio_ring.write_position - int(BACKPRESSURE_TARGET_LAG_S * sample_rate))
+                agreement.previous = []
+                decoded_samples = 0
+                continue
+
+            # With a backlog (replay at max speed, a decode stall) the segmenter runs ahead of the
+            # decodes, so utterances it closed stay queued until their audio has been decoded.
+            ended.extend(self.scan_for_speech(channel, segmenter))
+            while ended and ended[0][1] <= audio_ring.read_position:
+                ended.popleft()
+            if not agreement.previous:
+                # Drop the silence before the oldest undecoded speech, keeping its padding.
+                discard_from = audio_ring.read_position
+                audio_ring.discard_until(ended[0][0] if ended else segmenter.release_position)
+                decoded_samples = max(0, decoded_samples - (audio_ring.read_position - discard_from))
+                if not (ended or segmenter.in_speech):
+                    decoded_samples = audio_ring.available()
+                    continue
+
+            window_start, audio_np = audio_ring.peek(window_limit)
+            window_samples = len(audio_np)
+            window_end = window_start + window_samples
+            offset_s = window_start / sample_rate
+            # The oldest utterance ends inside this window with no further speech after it: a pause.
+            next_start = ended[1][0] if len(ended) > 1 else (segmenter.utterance_start if segmenter.in_speech else None)
+            utterance_ended = bool(ended) and ended[0][1] <= window_end and (next_start is None or next_start >= window_end)
+            # Each decode has to keep up with one step of new audio, whatever the window length.
+            # The speaker is identified once per hypothesis, before its first decode picks the language.
+            segments, info = self.run_transcribe(channel, audio_np, STREAMING_STEP_S,
+                                                 identify=not agreement.previous,
+                                                 beam_size=STREAMING_BEAM_SIZE,
+                                                 best_of=1,
+                                                 context_words=agreement.recent_committed,
+                                                 condition_on_previous_text=False,
+                                                 word_timestamps=True,
+                                                 vad_filter=False)
+            words = [(offset_s + w.start, offset_s + w.end, w.word.strip())
+                     for segment in segments for w in (segment.words or []) if w.word.strip()]
+            language = info.language
+
+            committed, partial = agreement.insert(words)
+            if partial and (window_samples >= window_limit or utterance_ended):
+                # The speaker paused, or there was no agreement within the longest window we re-decode.
+                committed += agreement.commit_pending()
+                partial = []
+            line_words.extend(committed)
+
+            # Trim committed audio from the window; with no words decoded, keep the current utterance
+            # (or at least the last step) for the next decode.
+            if words:
+                release_samples = int(agreement.committed_end_s * sample_rate) - window_start
+            else:
+                release_samples = min(window_samples - step_samples, segmenter.release_position - window_start)
+            release_samples = max(0, min(release_samples, window_samples))
+            if not audio_ring.release(window_start, release_samples):
+                print("Audio overrun while decoding; restarting the streaming hypothesis.", file=sys.stderr)
+                self.metrics.incr("audio_overruns")
+                agreement.previous = []
+            decoded_samples = window_samples - release_samples
+
+            line_end = max((i for i, w in enumerate(line_words) if w[2].endswith((".", "?", "!"))), default=-1)
+            if line_end < 0 and (len(line_words) >= STREAMING_MAX_LINE_WORDS or (line_words and not partial and not segmenter.in_speech)):
+                line_end = len(line_words) - 1
+            if line_end >= 0:
+                self.emit_word_line(channel, line_words[:line_end + 1], language)
+                line_words = line_words[line_end + 1:]
+            self.emit("partial", text=self.correct_text(" ".join(w[2] for w in line_words)),
+                      unstable_text=self.correct_text(" ".join(w[2] for w in partial)),
+                      speaker_id=self.speaker_for(channel))
+
+        # Flush whatever was still pending when listening stopped.
+        line_words.extend(agreement.commit_pending())
+        if line_words:
+            self.emit_word_line(channel, line_words, language)
+        else:
+            self.emit("partial", speaker_id=self.speaker_for(channel))
+
+    def emit_word_line(self, channel, words, language):
+        self.emit("caption", text=self.correct_text(" ".join(w[2] for w in words)), speaker_id=self.speaker_for(channel), language=language,
+                  start_s=words[0][0], end_s=words[-1][1])
+
+
+def send_message(sock, message, lock=None):
+    """Sends one length-prefixed JSON message; `lock` serializes senders on a shared socket."""
+    data = json.dumps(message).encode("utf-8")
+    if lock is None:
+        sock.sendall(struct.pack(">I", len(data)) + data)
+        return
+    with lock:
+        sock.sendall(struct.pack(">I", len(data)) + data)
+
+
+def recv_message(sock):
+    """Reads one message from `send_message`, or returns None once the peer has closed."""
+    header = recv_exactly(sock, 4)
+    if header is None:
+        return None
+    data = recv_exactly(sock, struct.unpack(">I", header)[0])
+    return None if data is None else json.loads(data.decode("utf-8"))
+
+
+def recv_exactly(sock, n):
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+class SharedMemorySource:
+    """Server side of a client's audio: a float32 ring in shared memory that the client fills.
+
+    The client announces how far it has written (`advance`); samples are copied out right away,
+    so the ring only has to cover the time between a write and its announcement.
+    """
+    channel_count = 1
+
+    def __init__(self, shm_name, capacity_samples):
+        self.shm = shared_memory.SharedMemory(name=shm_name)
+        # The client owns the segment; don't let this process's tracker unlink it on exit.
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        if not isinstance(capacity_samples, int) or not 0 < capacity_samples * 4 <= self.shm.size:
+            self.shm.close()
+            raise ValueError(f"ring capacity {capacity_samples!r} does not fit the {self.shm.size}-byte segment")
+        self.ring = np.ndarray((capacity_samples,), dtype=np.float32, buffer=self.shm.buf)
+        self.capacity = capacity_samples
+        self.position = 0
+        self.realtime = True # The client streams live capture
+        self.finished = False
+        self.channel = None
+
+    def start(self, channels):
+        self.channel = channels[0]
+
+    def stop(self):
+        pass # The client controls capture
+
+    def advance(self, write_position):
+        if write_position - self.position > self.capacity:
+            print("Client audio overran the shared ring; skipping ahead.", file=sys.stderr)
+            self.position = write_position - self.capacity
+        while self.position < write_position:
+            start = self.position % self.capacity
+            n = min(write_position - self.position, self.capacity - start)
+            self.channel.on_audio(self.ring[start:start + n].copy())
+            self.position += n
+
+    def close(self):
+        self.ring = None
+        self.shm.close()
+
+
+class InferenceServer:
+    """Local daemon that owns the Whisper models and captions audio for many clients.
+
+    Each connection gets its own CaptionEngine fed from the client's shared-memory ring, and its
+    CaptionEvents are sent back over the socket. All engines share one ModelRegistry (each model
+    is loaded once), one DecodeScheduler, so clients take turns on the CPU fairly, and one
+    DecodeBatcher, so utterances from different clients that arrive together share a batch.
+    """
+
+    def __init__(self, socket_path=INFERENCE_SOCKET_PATH, slots=INFERENCE_SERVER_SLOTS, memory_budget_mb=MODEL_MEMORY_BUDGET_MB):
+        self.socket_path = socket_path
+        self.model_registry = ModelRegistry(memory_budget_mb)
+        self.decode_scheduler = DecodeScheduler(slots)
+        self.decode_batcher = DecodeBatcher()
+        self.listener = None
+
+    def serve_forever(self):
+        # Only this user may connect: clients pick models and attach shared memory.
+        if os.path.dirname(self.socket_path):
+            os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path) # Left over from a previous run
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o177) # The socket file is created 0600
+        try:
+            self.listener.bind(self.socket_path)
+        finally:
+            os.umask(previous_umask)
+        self.listener.listen()
+        print(f"Inference server listening on {self.socket_path}")
+        try:
+            while True:
+                conn, _ = self.listener.accept()
+                threading.Thread(target=self.handle_client, args=(conn,), name="inference-client", daemon=True).start()
+        finally:
+            self.listener.close()
+            os.unlink(self.socket_path)
+
+    def handle_client(self, conn):
+        send_lock = threading.Lock()
+        engine = CaptionEngine(self.model_registry, self.decode_scheduler, self.decode_batcher)
+        source = None
+
+        def forward(event):
+            try:
+                send_message(conn, dict(event._asdict(), op="event"), send_lock)
+            except OSError:
+                engine.stop() # Client went away
+
+        try:
+            while True:
+                message = recv_message(conn)
+                if message is None:
+                    break
+                op = message["op"]
+                if op == "start":
+                    engine.apply_settings(message["settings"])
+                    try:
+                        if message["model"] not in MODEL_OPTIONS: # Never a path or a download of the client's choosing
+                            raise ValueError(f"Unknown model size {message['model']!r}")
+                        engine.load_model(message["model"]) # Shared with every client using the same model
+                    except Exception as e:
+                        forward(CaptionEvent("model_error", text=str(e), details={"model_size": message["model"]}))
+                        forward(CaptionEvent("stopped"))
+                        continue
+                    try:
+                        source = SharedMemorySource(message["shm"], message["capacity"])
+                    except (OSError, ValueError) as e:
+                        forward(CaptionEvent("error", text=f"Cannot attach the audio ring: {e}"))
+                        forward(CaptionEvent("stopped"))
+                        continue
+                    engine.subscribe(forward)
+                    engine.start(source)
+                elif op == "audio" and source is not None:
+                    source.advance(message["position"])
+                elif op == "settings":
+                    engine.apply_settings(message["settings"])
+                elif op == "end" and source is not None:
+                    source.finished = True # Finite input: flush and stop once the rest is transcribed
+                elif op == "stop":
+                    engine.stop()
+        except (OSError, ValueError) as e:
+            print(f"Inference client error: {e}", file=sys.stderr)
+        finally:
+            engine.stop()
+            engine.join(timeout=10.0)
+            engine.unsubscribe(forward)
+            if source is not None:
+                source.close()
+            conn.close()
+
+
+class InferenceClient:
+    """Captions through an InferenceServer instead of a local model.
+
+    It is the audio sink of a capture source (`start` starts it): samples go into a
+    shared-memory ring and only their position crosses the socket, sent by a sender thread so the
+    audio callback never waits on the socket. Server CaptionEvents are passed to callbacks
+    registered with `subscribe`, on the client's reader thread.
+    """
+
+    def __init__(self, socket_path=INFERENCE_SOCKET_PATH, capacity_s=INFERENCE_SHM_CAPACITY_S, sample_rate=AUDIO_SAMPLE_RATE):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.capacity = int(capacity_s * sample_rate)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * 4)
+        self.ring = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.shm.buf)
+        self.write_position = 0
+        self.is_running = False
+        self.source = None
+        self.subscribers = []
+        self._send_lock = threading.Lock()
+        self._audio_ready = threading.Event() # Set by on_audio (and end) for the sender thread
+        self._ending = False
+        self._reader = threading.Thread(target=self._read_loop, name="inference-client", daemon=True)
+        self._sender = threading.Thread(target=self._send_loop, name="inference-client-send", daemon=True)
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def start(self, model_size, settings, source):
+        """Opens a session on the server, then starts `source` capturing into this client."""
+        self.source = source
+        self.is_running = True
+        self._reader.start()
+        self._sender.start()
+        send_message(self.sock, {"op": "start", "model": model_size, "settings": settings,
+                                 "shm": self.shm.name, "capacity": self.capacity}, self._send_lock)
+        source.start([self])
+
+    def update_settings(self, settings):
+        send_message(self.sock, {"op": "settings", "settings": settings}, self._send_lock)
+
+    def on_audio(self, samples):
+        start = self.write_position % self.capacity
+        n = min(len(samples), self.capacity - start)
+        self.ring[start:start + n] = samples[:n]
+        self.ring[:len(samples) - n] = samples[n:]
+        self.write_position += len(samples)
+        self._audio_ready.set()
+
+    def latest(self, n):
+        """Copy of the newest `n` samples sent, for the local level meter."""
+        n = min(n, self.write_position, self.capacity)
+        end = self.write_position % self.capacity
+        if n <= end:
+            return self.ring[end - n:end].copy()
+        return np.concatenate((self.ring[self.capacity - (n - end):], self.ring[:end]))
+
+    def end(self):
+        """Marks a finite input as complete; the server stops after transcribing the rest."""
+        self._ending = True # Sent by the sender thread, after the last audio position
+        self._audio_ready.set()
+
+    def stop(self):
+        if self.source is not None:
+            self.source.stop()
+        try:
+            send_message(self.sock, {"op": "stop"}, self._send_lock)
+        except OSError:
+            pass
+
+    def _send_loop(self):
+        """Announces the newest write position; positions that pile up meanwhile go as one message."""
+        sent_position = 0
+        while self.is_running:
+            if not self._audio_ready.wait(0.1):
+                continue
+            self._audio_ready.clear()
+            ending = self._ending
+            try:
+                if self.write_position != sent_position:
+                    sent_position = self.write_position
+                    send_message(self.sock, {"op": "audio", "position": sent_position}, self._send_lock)
+                if ending:
+                    send_message(self.sock, {"op": "end"}, self._send_lock)
+                    return
+            except OSError:
+                return # The reader thread reports the lost connection
+
+    def _read_loop(self):
+        try:
+            while True:
+                message = recv_message(self.sock)
+                if message is None:
+                    raise OSError("inference server closed the connection")
+                del message["op"]
+                event = CaptionEvent(**message)
+                if event.kind == "stopped":
+                    break
+                for callback in list(self.subscribers):
+                    callback(event)
+        except (OSError, ValueError) as e:
+            event = CaptionEvent("error", text=f"Inference server: {e}")
+            for callback in list(self.subscribers):
+                callback(event)
+            event = CaptionEvent("stopped")
+        self.is_running = False
+        if self.source is not None:
+            self.source.stop() # No on_audio call may touch the ring once it is released
+        self._sender.join(timeout=1.0)
+        self.sock.close()
+        self.ring = None
+        self.shm.close()
+        self.shm.unlink()
+        for callback in list(self.subscribers):
+            callback(event)
+
+
+class TranscriptLog:
+    """Append-only JSONL transcript, written by a background thread.
+
+    Lines are either captions (`id`, `start`, `end`, `speaker`, `language`, `text`) or later
+    translation updates (`id`, `translation`), so a crash loses at most the last fsync interval.
+    Times are on the capture sample clock; `new_run()` moves the clock past the previous run so
+    one file stays a single timeline across Start/Stop.
+    """
+
+    def __init__(self, path, fsync_interval_s=TRANSCRIPT_FSYNC_INTERVAL_S):
+        self.path = path
+        self.fsync_interval_s = fsync_interval_s
+        self.clock_offset_s = 0.0
+        self.last_end_s = 0.0
+        self._next_id = 0
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def new_run(self):
+        self.clock_offset_s = self.last_end_s
+
+    def write_caption(self, text, speaker, language, start_s, end_s):
+        """Queues a caption line and returns its id for `write_translation`; never blocks."""
+        caption_id = self._next_id
+        self._next_id += 1
+        entry = {"id": caption_id, "time": round(time.time(), 3), "speaker": speaker, "language": language, "text": text}
+        if start_s is not None and end_s is not None:
+            entry["start"] = round(self.clock_offset_s + start_s, 3)
+            entry["end"] = round(self.clock_offset_s + end_s, 3)
+            self.last_end_s = max(self.last_end_s, entry["end"])
+        self._put(entry)
+        return caption_id
+
+    def write_translation(self, caption_id, translation, language):
+        self._put({"id": caption_id, "translation": translation, "translation_language": language})
+
+    def flush(self, timeout=5.0):
+        """Waits until everything queued so far is on disk."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def _put(self, item):
+        if self._thread is None: # The file is only created once there is something to keep
+            self._thread = threading.Thread(target=self._writer_loop, name="transcript-writer", daemon=True)
+            self._thread.start()
+        self._queue.put(item)
+
+    def _writer_loop(self):
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            f = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            print(f"Transcript log disabled: {e}", file=sys.stderr)
+            while True: # Keep draining so callers never block on flush()
+                item = self._queue.get()
+                if item is None:
+                    return
+                if isinstance(item, threading.Event):
+                    item.set()
+        with f:
+            dirty = False
+            next_sync = 0.0
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(0.0, next_sync - time.monotonic()) if dirty else None)
+                except queue.Empty:
+                    item = False # Fsync interval elapsed
+                if isinstance(item, dict):
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    if not dirty:
+                        dirty = True
+                        next_sync = time.monotonic() + self.fsync_interval_s
+                    continue
+                if dirty:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    dirty = False
+                if item is None:
+                    return
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+def read_transcript(path):
+    """Merges a TranscriptLog file into caption dicts for `write_captions`."""
+    captions = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # Torn last line after a crash
+            if "translation" in entry:
+                if entry["id"] in captions:
+                    captions[entry["id"]]["translation"] = f"{entry['translation_language'].upper()}: {entry['translation']}"
+            else:
+                captions[entry["id"]] = dict(entry)
+    # Lines without sample-clock times (e.g. errors) take the end of the caption before them.
+    last_end = 0.0
+    for caption in captions.values():
+        caption.setdefault("start", last_end)
+        caption.setdefault("end", caption["start"])
+        last_end = caption["end"]
+    return list(captions.values())
+
+
+class CaptionRecord:
+    """One committed caption. Slotted, since a long session keeps thousands of them."""
+    __slots__ = ("speaker_id", "text", "start_s", "end_s", "language", "target_lang", "translation_status", "translation", "log_id")
+
+    def __init__(self, speaker_id, text, start_s=None, end_s=None, language=None, target_lang=None):
+        self.speaker_id = speaker_id
+        self.text = text
+        self.start_s = start_s
+        self.end_s = end_s
+        self.language = language
+        self.target_lang = target_lang # None when no translation line is shown
+        self.translation_status = None # None while pending, then a TranslationWorkerPool status
+        self.translation = ""
+        self.log_id = None # Caption id in the transcript log
+
+
+class CaptionHistory:
+    """Every caption of the session, independent of how much of it the text widget shows."""
+
+    def __init__(self):
+        self.records = []
+        self._job_records = {} # translation job_id -> record index
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, record, job_id=None):
+        self.records.append(record)
+        if job_id is not None:
+            self._job_records[job_id] = len(self.records) - 1
+        return len(self.records) - 1
+
+    def set_translation(self, job_id, status, text):
+        """Stores a translation result and returns the record index, or None if it was cleared."""
+        index = self._job_records.pop(job_id, None)
+        if index is not None:
+            self.records[index].translation_status = status
+            self.records[index].translation = text
+        return index
+
+    def clear(self):
+        self.records.clear()
+        self._job_records.clear()
+
 
 class LiveTranscriberApp:
-    def __init__(self, root_window):
+    def __init__(self, root_window, server_path=None, glossary_path=None):
         self.root = root_window
         self.root.title("Enhanced Live Captions Tool")
         self.root.configure(bg=DARK_GRAY_BG)
         self.root.minsize(800, 600)
 
-        self.is_listening = False
-        self.audio_queue = queue.Queue()
-        self.transcription_thread = None
-        self.stream = None
+        # Capture, speaker/language state and inference live in the engine; this window is one subscriber.
+        self.engine = CaptionEngine()
+        self.engine_subscriber = lambda event: self.post(self.on_engine_event, event)
+        self.engine.subscribe(self.engine_subscriber)
         self.selected_device_id = None
-        self.current_audio_level = 0.0 # For audio visualizer
+        self.server_path = server_path # Caption through an InferenceServer instead of a local model
+        self.remote_client = None
+        self.level_meter = LevelMeter()
+        self.level_meter_job = None # Pending root.after for the meter; None while it is paused
         
         self.faster_whisper_model_size = "base" 
         
         self.speakers = {
-            1: {"nickname": "Speaker 1", "color": "#FFB6C1"}, # LightPink as a default
-            2: {"nickname": "Speaker 2", "color": "#ADD8E6"}  # LightBlue as a default
+            1: {"nickname": "Speaker 1", "color": SPEAKER_DEFAULT_COLORS[0]}, # LightPink as a default
+            2: {"nickname": "Speaker 2", "color": SPEAKER_DEFAULT_COLORS[1]}  # LightBlue as a default
         }
-        self.active_speaker = 1
         self.speaker_colors_vars = {1: tk.StringVar(value=self.speakers[1]["color"]),
                                     2: tk.StringVar(value=self.speakers[2]["color"])}
         self.speaker_nicknames_vars = {1: tk.StringVar(value=self.speakers[1]["nickname"]),
                                        2: tk.StringVar(value=self.speakers[2]["nickname"])}
 
-        self.current_language_from_settings = "en" 
-        self.transcription_lang_cycle = ["en", "es"] 
-        self.current_lang_cycle_idx = 0 
-
-        try:
-            self.model = WhisperModel(self.faster_whisper_model_size, device="cpu", compute_type="int8")
-            print(f"Successfully loaded Faster Whisper model: {self.faster_whisper_model_size}")
-        except Exception as e:
-            messagebox.showerror("Model Error", f"Failed to load Faster Whisper model: {e}\nPlease ensure '{self.faster_whisper_model_size}' is a valid multilingual model and dependencies (like ctranslate2, translators) are installed correctly.")
-            self.root.destroy()
-            return
+        # The model loads in the background so the window appears immediately.
+        self.app_start_time = time.perf_counter() # Startup timings go to engine.metrics.startup
+
+        # Only records [caption_render_start, caption_render_end) of the history are in the text widget.
+        self.caption_history = CaptionHistory()
+        self.caption_render_start = 0
+        self.caption_render_end = 0
+        self.caption_window_at_tail = True # False while the user has paged back past the newest captions
+        self.caption_dirty_records = set()  # Rendered records whose translation changed
+        self.caption_flush_scheduled = False
+        self.caption_page_scheduled = False
+        self.translation_log_ids = {} # translation job_id -> (transcript log id, target language); outlives Clear
+        self.transcript_log = TranscriptLog(os.path.join(TRANSCRIPT_DIR, time.strftime("transcript_%Y%m%d_%H%M%S.jsonl")))
+        self.translation_cache = TranslationCache()
+        self.translation_pool = TranslationWorkerPool(
+            make_translation_backend(),
+            on_result=lambda job_id, status, text: self.post(self.fill_translation_line, job_id, status, text),
+            metrics=self.engine.metrics,
+            cache=self.translation_cache
+        )
+        self.metrics_overlay_visible = False
+        self.metrics_overlay_job = None # Pending root.after for the overlay refresh
 
         self.setup_styles()
         self.create_main_layout()
@@ -86,7 +2854,73 @@ class LiveTranscriberApp:
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.root.bind("<space>", self.spacebar_action_event) 
-        self.update_audio_visualizer() # Start the visualizer loop
+        self.root.bind("<Map>", self.on_window_shown) # The meter pauses while the window is minimized
+        self.root.after_idle(self.on_first_paint)
+        self.request_model(self.faster_whisper_model_size)
+        if glossary_path:
+            self.load_glossary(glossary_path)
+
+    def on_first_paint(self):
+        first_paint_s = time.perf_counter() - self.app_start_time
+        self.engine.metrics.record_startup("first_paint_s", first_paint_s)
+        print(f"Window ready after {first_paint_s:.2f}s")
+
+    def on_engine_event(self, event):
+        """Applies a CaptionEvent from the engine on the Tk thread."""
+        if event.kind == "caption":
+            self.add_caption_line(event.text, event.speaker_id, event.start_s, event.end_s, event.language)
+        elif event.kind == "partial":
+            self.update_partial_caption(event.text, event.unstable_text, event.speaker_id)
+        elif event.kind == "skipped":
+            self.add_caption_line(event.text, event.speaker_id, event.start_s, event.end_s, translate=False)
+        elif event.kind == "error":
+            # Errors outside any speaker's audio (e.g. a lost inference server) go to the active speaker.
+            speaker_id = event.speaker_id if event.speaker_id is not None else self.engine.active_speaker
+            self.add_caption_line(f"[Error: {event.text}]", speaker_id)
+        elif event.kind == "stopped":
+            self.update_button_state()
+        elif event.kind == "model_ready":
+            self.on_model_loaded(event.text, event.details)
+        elif event.kind == "model_error":
+            model_size = event.details["model_size"]
+            self.update_model_status(f"Model '{model_size}' failed to load")
+            messagebox.showerror("Model Error", f"Failed to load Faster Whisper model: {event.text}\nPlease ensure '{model_size}' is a valid multilingual model and dependencies (like ctranslate2, translators) are installed correctly.")
+        elif event.kind == "profile_changed":
+            self.decode_profile_var.set(event.text)
+            if self.engine.model_size:
+                self.update_model_status(f"Model: {self.engine.model_size} ({event.text})")
+
+    def request_model(self, model_size):
+        """Switches to `model_size`, loading it in the background if it is not resident yet."""
+        if self.server_path:
+            self.faster_whisper_model_size = model_size # Loaded by the server at the next Start
+            self.update_model_status(f"Model: {model_size} (inference server)")
+            return
+        self.update_model_status(f"Loading model '{model_size}'…")
+        self.engine.request_model(model_size)
+
+    def on_model_loaded(self, model_size, details):
+        self.faster_whisper_model_size = model_size
+        if "model_ready_s" not in self.engine.metrics.startup:
+            model_ready_s = time.perf_counter() - self.app_start_time
+            self.engine.metrics.record_startup("model_ready_s", model_ready_s)
+            print(f"Successfully loaded Faster Whisper model: {model_size} ({details['load_s']:.2f}s, ready {model_ready_s:.2f}s after start)")
+        else:
+            print(f"Switched to Faster Whisper model: {model_size} ({details['profile']}) in {details['switch_s']:.2f}s")
+        self.update_model_status(f"Model: {model_size} ({details['profile']})")
+
+    def post(self, callback, *args):
+        """`root.after(0, ...)` from any thread, recording how long the Tk loop took to get to it."""
+        posted_at = time.perf_counter()
+
+        def run():
+            self.engine.metrics.observe("tk_dispatch_s", time.perf_counter() - posted_at)
+            callback(*args)
+
+        self.root.after(0, run)
+
+    def update_model_status(self, text):
+        self.model_status_label.config(text=text)
 
     def setup_styles(self):
         self.style = ttk.Style()
@@ -129,10 +2963,19 @@ class LiveTranscriberApp:
         self.audio_level_bar = ttk.Progressbar(self.top_bar_frame, mode='determinate', style="Horizontal.TProgressbar", length=100)
         self.audio_level_bar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0,10))
         self.audio_level_bar['value'] = 0
+        self.audio_peak_marker = tk.Frame(self.top_bar_frame, width=2, bg=LIGHT_GRAY_TEXT) # Peak-hold tick, placed over the bar
+        self.level_strip = tk.Canvas(self.top_bar_frame, width=LEVEL_STRIP_POINTS * 4, height=20, bg=CP_ACCENT_BG1, highlightthickness=0, borderwidth=0)
+        self.level_strip_bars = [self.level_strip.create_rectangle(i * 4, 20, i * 4 + 3, 20, fill=LIGHT_GRAY_TEXT, width=0)
+                                 for i in range(LEVEL_STRIP_POINTS)]
+        if self.level_meter.strip != "off":
+            self.level_strip.pack(side=tk.LEFT, padx=(0,10))
 
         self.controls_frame = ttk.Frame(self.top_bar_frame, style="TFrame")
         self.controls_frame.pack(side=tk.RIGHT)
 
+        self.model_status_label = tk.Label(self.controls_frame, text="", bg=DARK_GRAY_BG, fg=TRANSLATION_TEXT_COLOR, font=("Arial", 9, "italic"))
+        self.model_status_label.pack(side=tk.LEFT, padx=(0,8))
+
         self.start_stop_button = tk.Button(self.controls_frame, text="▶ Start", command=self.toggle_transcription, 
                                            bg=BTN_START_BG, fg=BTN_START_FG, font=("Arial", 10, "bold"), width=8, relief=tk.FLAT, borderwidth=0, highlightthickness=0)
         self.start_stop_button.pack(side=tk.LEFT, padx=3)
@@ -141,20 +2984,27 @@ class LiveTranscriberApp:
                                       bg=BTN_CLEAR_BG, fg=BTN_CLEAR_FG, font=("Arial", 10, "bold"), width=6, relief=tk.FLAT, borderwidth=0, highlightthickness=0)
         self.clear_button.pack(side=tk.LEFT, padx=3)
 
+        self.export_button = tk.Button(self.controls_frame, text="Export", command=self.export_transcript,
+                                       bg=BTN_CLEAR_BG, fg=BTN_CLEAR_FG, font=("Arial", 10, "bold"), width=6, relief=tk.FLAT, borderwidth=0, highlightthickness=0)
+        self.export_button.pack(side=tk.LEFT, padx=3)
+
         self.settings_button = tk.Button(self.controls_frame, text="⚙", command=self.toggle_settings_sidebar,
                                          bg=DARK_GRAY_BG, fg=SETTINGS_ICON_COLOR, font=("Arial", 14, "bold"), relief=tk.FLAT, borderwidth=0, highlightthickness=0)
         self.settings_button.pack(side=tk.LEFT, padx=(3,0))
 
+        # Performance overlay, packed under the top bar when enabled in settings
+        self.metrics_overlay_label = tk.Label(self.root, text="", bg=CP_ACCENT_BG1, fg=CP_SECONDARY_TEXT, font=("Courier", 9), anchor=tk.W, justify=tk.LEFT)
+
         self.speaker_info_frame = tk.Frame(self.root, bg=SPEAKER_INFO_BG, height=40) 
         self.speaker_info_frame.pack(side=tk.TOP, fill=tk.X, pady=(0,5), padx=10)
         self.speaker_info_frame.pack_propagate(False) 
 
-        self.speaker_label = tk.Label(self.speaker_info_frame, text=f"Active: {self.speakers[self.active_speaker]['nickname']}", 
+        self.speaker_label = tk.Label(self.speaker_info_frame, text=f"Active: {self.speakers[self.engine.active_speaker]['nickname']}", 
                                       bg=SPEAKER_INFO_BG, fg=LIGHT_GRAY_TEXT, font=("Arial", 11))
         self.speaker_label.pack(side=tk.LEFT, padx=(10,5), pady=5)
 
         self.speaker_color_indicator = tk.Frame(self.speaker_info_frame, width=20, height=20, relief=tk.FLAT, borderwidth=1,
-                                                bg=self.speakers[self.active_speaker]['color'])
+                                                bg=self.speakers[self.engine.active_speaker]['color'])
         self.speaker_color_indicator.pack(side=tk.LEFT, padx=(0,15), pady=5)
 
         # This label is now part of the "Switch Spk/Lang" button text
@@ -162,7 +3012,7 @@ class LiveTranscriberApp:
         # self.transcription_language_label.pack(...)
 
         # "Switch Spk" button now also handles language and updates its text
-        initial_btn_lang = self.transcription_lang_cycle[self.current_lang_cycle_idx].upper()
+        initial_btn_lang = self.engine.cycle_language().upper()
         self.switch_speaker_lang_button = tk.Button(self.speaker_info_frame, text=f"Switch ({initial_btn_lang})", command=self.spacebar_action_event,
                                                bg=SWITCH_SPK_BTN_BG, fg=SWITCH_SPK_BTN_FG, font=("Arial", 9, "bold"), relief=tk.FLAT, borderwidth=0, highlightthickness=0, width=12)
         self.switch_speaker_lang_button.pack(side=tk.RIGHT, padx=10, pady=5)
@@ -177,10 +3027,12 @@ class LiveTranscriberApp:
             padx=10, pady=10, state=tk.DISABLED 
         )
         self.caption_display_area.pack(fill=tk.BOTH, expand=True)
+        self.caption_display_area.config(yscrollcommand=self.on_caption_scroll)
         
         self.caption_display_area.tag_configure("speaker1_nick", foreground=self.speakers[1]['color'], font=("Arial", 14, "bold"))
         self.caption_display_area.tag_configure("speaker2_nick", foreground=self.speakers[2]['color'], font=("Arial", 14, "bold"))
         self.caption_display_area.tag_configure("translation_style", foreground=TRANSLATION_TEXT_COLOR, font=("Arial", 11, "italic"), lmargin1=20, lmargin2=20)
+        self.caption_display_area.tag_configure("partial_style", foreground=PARTIAL_TEXT_COLOR)
 
 
     def create_settings_sidebar(self):
@@ -215,10 +3067,23 @@ class LiveTranscriberApp:
         self.device_dropdown = ttk.Combobox(content_frame, textvariable=self.device_var, state="readonly", width=35, font=("Arial", 9), style="Settings.TCombobox")
         self.device_dropdown.pack(pady=(0,10), padx=10, fill=tk.X)
         self.device_dropdown.bind("<<ComboboxSelected>>", self.on_device_select)
+
+        ttk.Label(content_frame, text="Level Meter Strip:", style="Settings.TLabel").pack(anchor=tk.W, padx=10)
+        self.level_strip_var = tk.StringVar(value=self.level_meter.strip)
+        self.level_strip_dropdown = ttk.OptionMenu(content_frame, self.level_strip_var, self.level_meter.strip, *LEVEL_METER_STRIPS, command=self.on_level_strip_select, style="TMenubutton")
+        self.level_strip_dropdown.config(width=33)
+        self.level_strip_dropdown.pack(pady=(0,10), padx=10, fill=tk.X)
+
+        ttk.Label(content_frame, text="Speaker 2 Input:", style="Settings.TLabel").pack(anchor=tk.W, padx=10)
+        self.speaker2_input_var = tk.StringVar(value=SPEAKER2_INPUT_TOGGLE)
+        self.speaker2_input_dropdown = ttk.Combobox(content_frame, textvariable=self.speaker2_input_var, state="readonly", width=35, font=("Arial", 9), style="Settings.TCombobox")
+        self.speaker2_input_dropdown['values'] = [SPEAKER2_INPUT_TOGGLE, SPEAKER2_INPUT_CHANNEL]
+        self.speaker2_input_dropdown.pack(pady=(0,0), padx=10, fill=tk.X)
+        tk.Label(content_frame, text="(A separate input attributes speakers automatically)", font=("Arial", 8), bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT).pack(padx=10, pady=(0,10), anchor=tk.W)
         
         ttk.Label(content_frame, text="Default Language (Overrides Spacebar on Select):", style="Settings.TLabel").pack(anchor=tk.W, padx=10)
         self.languages_map = {"Auto-Detect": None, "English": "en", "Spanish": "es", "French": "fr", "German": "de", "Chinese": "zh", "Japanese": "ja", "Korean": "ko", "Italian": "it", "Russian": "ru", "Portuguese": "pt"}
-        initial_lang_key = [k for k,v in self.languages_map.items() if v == self.current_language_from_settings]
+        initial_lang_key = [k for k,v in self.languages_map.items() if v == self.engine.settings_language]
         initial_lang_key = initial_lang_key[0] if initial_lang_key else "English" 
         self.language_var = tk.StringVar(value=initial_lang_key)
         
@@ -244,12 +3109,63 @@ class LiveTranscriberApp:
             else: self.s2_color_preview = preview
 
         ttk.Label(content_frame, text="Whisper Model Size:", style="Settings.TLabel").pack(anchor=tk.W, padx=10, pady=(10,0))
-        model_sizes = ["tiny", "base", "small", "medium", "large-v2", "large-v3"] 
+        model_sizes = [size for size in MODEL_OPTIONS if not size.endswith(".en")]
         self.model_size_var = tk.StringVar(value=self.faster_whisper_model_size)
         self.model_size_dropdown = ttk.OptionMenu(content_frame, self.model_size_var, self.faster_whisper_model_size, *model_sizes, command=self.on_model_size_select, style="TMenubutton")
         self.model_size_dropdown.config(width=33)
         self.model_size_dropdown.pack(pady=(0,5), padx=10, fill=tk.X)
-        tk.Label(content_frame, text="(Restart required to change model)", font=("Arial", 8), bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT).pack(padx=10, pady=(0,10), anchor=tk.W)
+        tk.Label(content_frame, text="(Switches live once loaded)", font=("Arial", 8), bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT).pack(padx=10, pady=(0,10), anchor=tk.W)
+
+        ttk.Label(content_frame, text="Glossary (names and jargon):", style="Settings.TLabel").pack(anchor=tk.W, padx=10, pady=(10,0))
+        glossary_frame = ttk.Frame(content_frame, style="Settings.TFrame")
+        glossary_frame.pack(padx=10, pady=(0,5), fill=tk.X)
+        ttk.Button(glossary_frame, text="Load…", command=self.choose_glossary, style="Settings.TButton").pack(side=tk.LEFT)
+        ttk.Button(glossary_frame, text="Clear", command=lambda: self.set_glossary(None, "No glossary"), style="Settings.TButton").pack(side=tk.LEFT, padx=(5,0))
+        self.glossary_label = tk.Label(content_frame, text="No glossary", font=("Arial", 8), bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT)
+        self.glossary_label.pack(padx=10, pady=(0,5), anchor=tk.W)
+
+        ttk.Label(content_frame, text="Decode Profile:", style="Settings.TLabel").pack(anchor=tk.W, padx=10, pady=(10,0))
+        self.decode_profile_var = tk.StringVar(value=self.engine.decode_profile_name)
+        self.decode_profile_dropdown = ttk.OptionMenu(content_frame, self.decode_profile_var, self.engine.decode_profile_name, *DECODE_PROFILE_ORDER, command=self.on_decode_profile_select, style="TMenubutton")
+        self.decode_profile_dropdown.config(width=33)
+        self.decode_profile_dropdown.pack(pady=(0,5), padx=10, fill=tk.X)
+        self.auto_tune_var = tk.BooleanVar(value=self.engine.auto_tune)
+        tk.Checkbutton(content_frame, text="Auto-tune when falling behind", variable=self.auto_tune_var, command=self.on_auto_tune_toggle,
+                       bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT, selectcolor=CP_ACCENT_BG1, activebackground=CP_ACCENT_BG2, activeforeground=LIGHT_GRAY_TEXT,
+                       font=("Arial", 10), relief=tk.FLAT, borderwidth=0, highlightthickness=0).pack(padx=10, pady=(0,5), anchor=tk.W)
+        ttk.Label(content_frame, text="When Falling Behind:", style="Settings.TLabel").pack(anchor=tk.W, padx=10, pady=(0,0))
+        self.backpressure_policy_var = tk.StringVar(value=self.engine.backpressure_policy)
+        self.backpressure_policy_dropdown = ttk.OptionMenu(content_frame, self.backpressure_policy_var, self.engine.backpressure_policy, *BACKPRESSURE_POLICIES, command=self.on_backpressure_policy_select, style="TMenubutton")
+        self.backpressure_policy_dropdown.config(width=33)
+        self.backpressure_policy_dropdown.pack(pady=(0,10), padx=10, fill=tk.X)
+
+        ttk.Label(content_frame, text="Translation Backend:", style="Settings.TLabel").pack(anchor=tk.W, padx=10, pady=(10,0))
+        self.translation_backend_kind = TRANSLATION_BACKEND
+        self.translation_backend_var = tk.StringVar(value=TRANSLATION_BACKEND)
+        self.translation_backend_dropdown = ttk.OptionMenu(content_frame, self.translation_backend_var, TRANSLATION_BACKEND, "auto", "online", "offline", command=self.on_translation_backend_select, style="TMenubutton")
+        self.translation_backend_dropdown.config(width=33)
+        self.translation_backend_dropdown.pack(pady=(0,10), padx=10, fill=tk.X)
+
+        self.metrics_overlay_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(content_frame, text="Show performance overlay", variable=self.metrics_overlay_var, command=self.on_metrics_overlay_toggle,
+                       bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT, selectcolor=CP_ACCENT_BG1, activebackground=CP_ACCENT_BG2, activeforeground=LIGHT_GRAY_TEXT,
+                       font=("Arial", 10), relief=tk.FLAT, borderwidth=0, highlightthickness=0).pack(padx=10, pady=(10,0), anchor=tk.W)
+        self.metrics_export_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(content_frame, text=f"Export metrics to {METRICS_EXPORT_PATH}", variable=self.metrics_export_var, command=self.on_metrics_export_toggle,
+                       bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT, selectcolor=CP_ACCENT_BG1, activebackground=CP_ACCENT_BG2, activeforeground=LIGHT_GRAY_TEXT,
+                       font=("Arial", 10), relief=tk.FLAT, borderwidth=0, highlightthickness=0).pack(padx=10, pady=(0,0), anchor=tk.W)
+
+        self.identify_speakers_var = tk.BooleanVar(value=self.engine.identify_speakers)
+        tk.Checkbutton(content_frame, text="Identify speakers by voice", variable=self.identify_speakers_var, command=self.on_identify_speakers_toggle,
+                       bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT, selectcolor=CP_ACCENT_BG1, activebackground=CP_ACCENT_BG2, activeforeground=LIGHT_GRAY_TEXT,
+                       font=("Arial", 10), relief=tk.FLAT, borderwidth=0, highlightthickness=0).pack(padx=10, pady=(10,0), anchor=tk.W)
+        tk.Label(content_frame, text=f"(Up to {SPEAKER_MAX_CLUSTERS} voices; replaces the Spacebar speaker)", font=("Arial", 8), bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT).pack(padx=10, pady=(0,0), anchor=tk.W)
+
+        self.streaming_mode_var = tk.BooleanVar(value=self.engine.streaming_mode)
+        tk.Checkbutton(content_frame, text="Streaming mode (low latency)", variable=self.streaming_mode_var, command=self.on_streaming_mode_toggle,
+                       bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT, selectcolor=CP_ACCENT_BG1, activebackground=CP_ACCENT_BG2, activeforeground=LIGHT_GRAY_TEXT,
+                       font=("Arial", 10), relief=tk.FLAT, borderwidth=0, highlightthickness=0).pack(padx=10, pady=(10,0), anchor=tk.W)
+        tk.Label(content_frame, text="(Applies on next Start)", font=("Arial", 8), bg=CP_ACCENT_BG2, fg=LIGHT_GRAY_TEXT).pack(padx=10, pady=(0,10), anchor=tk.W)
 
         apply_button = ttk.Button(content_frame, text="Apply Speaker Settings", command=self.apply_speaker_settings, style="Settings.TButton")
         apply_button.pack(pady=20, padx=10, fill=tk.X)
@@ -260,6 +3176,8 @@ class LiveTranscriberApp:
             self.input_devices = [(i, d['name']) for i, d in enumerate(devices) if d['max_input_channels'] > 0]
             if self.input_devices:
                 self.device_dropdown['values'] = [f"{i}: {name}" for i, name in self.input_devices]
+                self.speaker2_input_dropdown['values'] = [SPEAKER2_INPUT_TOGGLE, SPEAKER2_INPUT_CHANNEL] + \
+                                                         [f"{i}: {name}" for i, name in self.input_devices]
                 if not self.selected_device_id and self.input_devices: 
                      self.device_dropdown.current(0)
                      self.on_device_select() 
@@ -275,6 +3193,15 @@ class LiveTranscriberApp:
                 self.device_dropdown['values'] = ["Error loading devices"]
                 self.device_dropdown.current(0)
 
+    def build_capture_sources(self):
+        """The selected device, plus Speaker 2's own channel or device when one is chosen."""
+        speaker2_input = self.speaker2_input_var.get()
+        if speaker2_input == SPEAKER2_INPUT_CHANNEL:
+            return [SoundDeviceSource(self.selected_device_id, channels=2)]
+        if speaker2_input != SPEAKER2_INPUT_TOGGLE:
+            return [SoundDeviceSource(self.selected_device_id), SoundDeviceSource(int(speaker2_input.split(":")[0]))]
+        return [SoundDeviceSource(self.selected_device_id)]
+
     def on_device_select(self, event=None):
         if not self.input_devices: 
             self.selected_device_id = None
@@ -294,21 +3221,131 @@ class LiveTranscriberApp:
             self.selected_device_id = None
 
     def on_language_select_from_settings(self, selected_lang_key):
-        self.current_language_from_settings = self.languages_map.get(selected_lang_key, "en") 
-        print(f"Settings language selected: {self.current_language_from_settings or 'Auto-Detect'}")
-        if self.current_language_from_settings == "en":
-            self.current_lang_cycle_idx = self.transcription_lang_cycle.index("en")
-        elif self.current_language_from_settings == "es":
-            self.current_lang_cycle_idx = self.transcription_lang_cycle.index("es")
+        self.engine.set_settings_language(self.languages_map.get(selected_lang_key, "en"))
+        print(f"Settings language selected: {self.engine.settings_language or 'Auto-Detect'}")
         self.update_ui_language_indicators()
 
 
     def on_model_size_select(self, selected_model_size):
-        if selected_model_size != self.faster_whisper_model_size:
-            if ".en" in selected_model_size and ("es" in self.transcription_lang_cycle): 
-                 messagebox.showwarning("Model Incompatible", f"Model '{selected_model_size}' is English-only. For Spanish transcription or toggling, a multilingual model (e.g., 'base', 'small') is required. Please restart to apply a multilingual model if needed.")
-            self.faster_whisper_model_size = selected_model_size
-            messagebox.showinfo("Model Change", f"Model size set to '{selected_model_size}'.\nPlease restart the application for the change to take effect.")
+        current_model_size = self.faster_whisper_model_size if self.server_path else self.engine.requested_model_size
+        if selected_model_size != current_model_size:
+            if ".en" in selected_model_size and ("es" in self.engine.language_cycle): 
+                 messagebox.showwarning("Model Incompatible", f"Model '{selected_model_size}' is English-only. For Spanish transcription or toggling, a multilingual model (e.g., 'base', 'small') is required.")
+            self.request_model(selected_model_size)
+
+    def on_decode_profile_select(self, selected_profile):
+        self.engine.auto_tuner.set_ceiling(selected_profile)
+        self.engine.set_decode_profile(selected_profile)
+        self.sync_remote_settings()
+        print(f"Decode profile set to: {selected_profile}")
+
+    def on_translation_backend_select(self, selected_backend):
+        try:
+            self.translation_pool.backend = make_translation_backend(selected_backend)
+        except RuntimeError as e:
+            messagebox.showerror("Translation Backend", f"Cannot use the {selected_backend} backend: {e}")
+            self.translation_backend_var.set(self.translation_backend_kind)
+            return
+        self.translation_backend_kind = selected_backend
+        print(f"Translation backend set to: {selected_backend}")
+
+    def on_level_strip_select(self, selected_strip):
+        self.level_meter.strip = selected_strip
+        if selected_strip == "off":
+            self.level_strip.pack_forget()
+        else:
+            self.level_strip.pack(side=tk.LEFT, padx=(0,10), after=self.audio_level_bar)
+        print(f"Level meter strip set to: {selected_strip}")
+
+    def on_backpressure_policy_select(self, selected_policy):
+        self.engine.backpressure_policy = selected_policy
+        self.sync_remote_settings()
+        print(f"Backpressure policy set to: {selected_policy}")
+
+    def on_auto_tune_toggle(self):
+        self.engine.set_auto_tune(self.auto_tune_var.get())
+        self.sync_remote_settings()
+        print(f"Decode auto-tuning {'enabled' if self.engine.auto_tune else 'disabled'}")
+
+    def on_metrics_overlay_toggle(self):
+        self.metrics_overlay_visible = self.metrics_overlay_var.get()
+        if self.metrics_overlay_job is not None: # Never leave a second refresh loop running
+            self.root.after_cancel(self.metrics_overlay_job)
+            self.metrics_overlay_job = None
+        if self.metrics_overlay_visible:
+            self.metrics_overlay_label.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(0,5), after=self.top_bar_frame)
+            self.update_metrics_overlay()
+        else:
+            self.metrics_overlay_label.pack_forget()
+
+    def on_metrics_export_toggle(self):
+        if self.metrics_export_var.get():
+            self.engine.metrics.start_export(METRICS_EXPORT_PATH, METRICS_EXPORT_INTERVAL_S)
+            print(f"Exporting metrics to {METRICS_EXPORT_PATH} every {METRICS_EXPORT_INTERVAL_S:.0f}s")
+        else:
+            self.engine.metrics.stop_export()
+
+    def update_metrics_overlay(self):
+        """Refreshes the overlay once a second while it is shown."""
+        self.metrics_overlay_job = None
+        if not self.metrics_overlay_visible:
+            return
+        snapshot = self.engine.metrics.snapshot()
+        audio = snapshot["gauges"].get("audio", {})
+        timings = snapshot["timings"]
+
+        def last_ms(name):
+            return f"{timings[name]['last'] * 1000:.0f}ms" if name in timings else "-"
+
+        rtf = f"{timings['transcribe_rtf']['mean']:.2f}" if "transcribe_rtf" in timings else "-"
+        startup = snapshot["startup"]
+        self.metrics_overlay_label.config(text=(
+            f"Queue {audio.get('lag_s', 0):.1f}s (max {audio.get('max_lag_s', 0):.1f}s)  "
+            f"Buffered {snapshot['gauges'].get('samples_buffered', 0)}  "
+            f"Decode {last_ms('transcribe_s')} RTF {rtf}  "
+            f"Translate {last_ms('translation_s')}  "
+            f"Tk {last_ms('tk_dispatch_s')}  "
+            f"Dropped {audio.get('dropped_samples', 0)}  "
+            f"Startup: window {startup.get('first_paint_s', 0):.2f}s, model ready {startup.get('model_ready_s', 0):.1f}s "
+            f"(load {startup.get('model_load_s', 0):.1f}s, last switch {startup.get('model_switch_s', 0):.2f}s)"
+        ))
+        self.metrics_overlay_job = self.root.after(METRICS_OVERLAY_INTERVAL_MS, self.update_metrics_overlay)
+
+    def choose_glossary(self):
+        path = filedialog.askopenfilename(title="Load Glossary", filetypes=[("Text", "*.txt"), ("All files", "*")])
+        if path:
+            self.load_glossary(path)
+
+    def load_glossary(self, path):
+        try:
+            glossary = Glossary.load(path)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Glossary", f"Could not read {path}: {e}")
+            return
+        self.set_glossary(glossary, f"{os.path.basename(path)}: {len(glossary.terms)} terms")
+
+    def set_glossary(self, glossary, description):
+        self.engine.set_glossary(glossary)
+        self.glossary_label.config(text=description)
+        self.sync_remote_settings()
+        print(f"Glossary: {description}")
+
+    def on_identify_speakers_toggle(self):
+        self.engine.set_identify_speakers(self.identify_speakers_var.get())
+        self.sync_remote_settings()
+        print(f"Speaker identification {'enabled' if self.engine.identify_speakers else 'disabled'}")
+
+    def ensure_speaker(self, speaker_id):
+        """Gives speakers found by identification (3, 4, ...) a default nickname and color."""
+        if speaker_id not in self.speakers:
+            color = SPEAKER_DEFAULT_COLORS[(speaker_id - 1) % len(SPEAKER_DEFAULT_COLORS)]
+            self.speakers[speaker_id] = {"nickname": f"Speaker {speaker_id}", "color": color}
+            self.caption_display_area.tag_configure(f"speaker{speaker_id}_nick", foreground=color, font=("Arial", 14, "bold"))
+
+    def on_streaming_mode_toggle(self):
+        self.engine.streaming_mode = self.streaming_mode_var.get()
+        self.sync_remote_settings()
+        print(f"Streaming mode {'enabled' if self.engine.streaming_mode else 'disabled'}")
 
     def pick_speaker_color(self, speaker_id):
         current_color = self.speakers[speaker_id]['color']
@@ -344,8 +3381,8 @@ class LiveTranscriberApp:
         self.settings_sidebar_visible = not self.settings_sidebar_visible
 
     def update_speaker_info_display(self):
-        self.speaker_label.config(text=f"Active: {self.speakers[self.active_speaker]['nickname']}")
-        self.speaker_color_indicator.config(bg=self.speakers[self.active_speaker]['color'])
+        self.speaker_label.config(text=f"Active: {self.speakers[self.engine.active_speaker]['nickname']}")
+        self.speaker_color_indicator.config(bg=self.speakers[self.engine.active_speaker]['color'])
 
     def toggle_active_speaker_only_event(self, event=None): 
         """Legacy function, spacebar_action_event is primary now for this button."""
@@ -353,196 +3390,691 @@ class LiveTranscriberApp:
 
 
     def spacebar_action_event(self, event=None):
-        # Toggle transcription language
-        self.current_lang_cycle_idx = (self.current_lang_cycle_idx + 1) % len(self.transcription_lang_cycle)
-        
-        # Toggle active speaker
-        self.active_speaker = 2 if self.active_speaker == 1 else 1
+        # Toggle transcription language and active speaker
+        self.engine.toggle_speaker()
         
         self.update_ui_language_indicators() # Updates both speaker and language displays
-        print(f"Transcription language toggled to: {self.transcription_lang_cycle[self.current_lang_cycle_idx].upper()}")
-        print(f"Active speaker toggled to: {self.speakers[self.active_speaker]['nickname']}")
+        print(f"Transcription language toggled to: {self.engine.cycle_language().upper()}")
+        print(f"Active speaker toggled to: {self.speakers[self.engine.active_speaker]['nickname']}")
 
 
     def update_ui_language_indicators(self):
         # Update speaker display
-        self.speaker_label.config(text=f"Active: {self.speakers[self.active_speaker]['nickname']}")
-        self.speaker_color_indicator.config(bg=self.speakers[self.active_speaker]['color'])
+        self.speaker_label.config(text=f"Active: {self.speakers[self.engine.active_speaker]['nickname']}")
+        self.speaker_color_indicator.config(bg=self.speakers[self.engine.active_speaker]['color'])
         
         # Update language display on the "Switch (Lang)" button
-        lang_code = self.transcription_lang_cycle[self.current_lang_cycle_idx]
+        lang_code = self.engine.cycle_language()
         self.switch_speaker_lang_button.config(text=f"Switch ({lang_code.upper()})")
+        self.sync_remote_settings() # Speaker and language live on the server
 
+    def sync_remote_settings(self):
+        """Sends the engine settings to the inference server; every settings handler calls this."""
+        if self.remote_client is not None and self.remote_client.is_running:
+            self.remote_client.update_settings(self.engine.settings())
+
+
+    def export_transcript(self):
+        """Writes the whole session (including cleared lines) from the transcript log."""
+        self.transcript_log.flush()
+        if not os.path.exists(self.transcript_log.path):
+            messagebox.showinfo("Export Transcript", "Nothing has been transcribed yet.")
+            return
+        path = filedialog.asksaveasfilename(title="Export Transcript", defaultextension=".srt",
+                                            filetypes=[(fmt.upper(), f"*.{fmt}") for fmt in BATCH_OUTPUT_FORMATS])
+        if not path:
+            return
+        output_format = os.path.splitext(path)[1].lstrip(".").lower()
+        if output_format not in BATCH_OUTPUT_FORMATS:
+            output_format = "srt"
+        try:
+            write_captions(path, read_transcript(self.transcript_log.path), output_format)
+        except OSError as e:
+            messagebox.showerror("Export Transcript", f"Could not write {path}: {e}")
+            return
+        print(f"Transcript exported to {path}")
 
     def clear_text_history(self):
+        self.caption_history.clear()
+        self.caption_render_start = self.caption_render_end = 0
+        self.caption_window_at_tail = True
+        self.caption_dirty_records.clear()
         self.caption_display_area.config(state=tk.NORMAL) 
         self.caption_display_area.delete(1.0, tk.END)    
         self.caption_display_area.config(state=tk.DISABLED) 
         self.audio_level_bar['value'] = 0 # Reset audio visualizer too
+        self.draw_peak_marker(LEVEL_METER_FLOOR_DB)
 
-    def add_caption_line(self, original_text, speaker_id):
+    def add_caption_line(self, original_text, speaker_id, start_s=None, end_s=None, language=None, translate=True):
+        self.ensure_speaker(speaker_id)
         self.caption_display_area.config(state=tk.NORMAL)
-        speaker_nickname = self.speakers[speaker_id]['nickname']
-        nick_tag = f"speaker{speaker_id}_nick"
-        
-        self.caption_display_area.insert(tk.END, speaker_nickname + ": ", (nick_tag,))
-        self.caption_display_area.insert(tk.END, original_text + "\n")
-
-        source_lang = self.transcription_lang_cycle[self.current_lang_cycle_idx]
-        target_lang_idx = (self.current_lang_cycle_idx + 1) % len(self.transcription_lang_cycle)
-        target_lang = self.transcription_lang_cycle[target_lang_idx]
-        translated_text_display = ""
-        try:
-            if original_text.strip(): 
-                translated_text_api = ts.translate_text(original_text, to_language=target_lang, from_language=source_lang)
-                translated_text_display = f"  ↳ {target_lang.upper()}: {translated_text_api}"
-            else:
-                translated_text_display = "" 
-        except Exception as e:
-            print(f"Translation Error: {e}", file=sys.stderr)
-            translated_text_display = f"  ↳ {target_lang.upper()}: [Translation not available]"
-        
-        if translated_text_display: 
-            self.caption_display_area.insert(tk.END, translated_text_display + "\n", ("translation_style",))
-        
-        self.caption_display_area.see(tk.END) 
+        self.clear_partial_caption()
+        self.caption_display_area.config(state=tk.DISABLED)
+        original_text = original_text.replace("\n", " ")
+        record = CaptionRecord(speaker_id, original_text, start_s, end_s, language)
+        job_id = None
+        if original_text.strip() and translate: 
+            # Show the caption now; the translation line is filled in place once the worker pool delivers it.
+            source_lang, record.target_lang = self.engine.translation_languages(language)
+            job_id = self.translation_pool.submit(original_text, speaker_id, source_lang, record.target_lang)
+        self.caption_history.append(record, job_id)
+        record.log_id = self.transcript_log.write_caption(original_text, self.speakers[speaker_id]['nickname'], language, start_s, end_s)
+        if job_id is not None:
+            self.translation_log_ids[job_id] = (record.log_id, record.target_lang)
+        self.schedule_caption_flush()
+
+    def fill_translation_line(self, job_id, status, translated_text):
+        log_id, target_lang = self.translation_log_ids.pop(job_id, (None, None))
+        if log_id is not None and status == "ok":
+            self.transcript_log.write_translation(log_id, translated_text, target_lang)
+        index = self.caption_history.set_translation(job_id, status, translated_text)
+        if index is not None and self.caption_render_start <= index < self.caption_render_end:
+            self.caption_dirty_records.add(index)
+            self.schedule_caption_flush()
+
+    def schedule_caption_flush(self):
+        """Captions and translations arriving in a burst reach the widget in one update."""
+        if not self.caption_flush_scheduled:
+            self.caption_flush_scheduled = True
+            self.root.after_idle(self.flush_caption_updates)
+
+    def caption_record_lines(self, record):
+        return 2 if record.target_lang else 1
+
+    def caption_record_line(self, index):
+        """Text widget line number of rendered record `index`."""
+        records = self.caption_history.records
+        return 1 + sum(self.caption_record_lines(r) for r in records[self.caption_render_start:index])
+
+    def caption_translation_display(self, record):
+        if record.translation_status == "ok":
+            text = record.translation
+        elif record.translation_status == "timeout":
+            text = "[Translation timed out]"
+        elif record.translation_status == "dropped":
+            text = "[Translation skipped]"
+        elif record.translation_status is None:
+            text = TRANSLATION_PLACEHOLDER
+        else:
+            text = "[Translation not available]"
+        return f"  ↳ {record.target_lang.upper()}: {text}"
+
+    def caption_insert_args(self, first, last):
+        """Text/tag pairs for records [first, last), for a single `Text.insert` call."""
+        args = []
+        for record in self.caption_history.records[first:last]:
+            args += [self.speakers[record.speaker_id]['nickname'] + ": ", (f"speaker{record.speaker_id}_nick",),
+                     record.text + "\n", ()]
+            if record.target_lang:
+                args += [self.caption_translation_display(record) + "\n", ("translation_style",)]
+        return args
+
+    def flush_caption_updates(self):
+        self.caption_flush_scheduled = False
+        area = self.caption_display_area
+        at_bottom = area.yview()[1] >= 1.0
+        area.config(state=tk.NORMAL)
+
+        for index in sorted(self.caption_dirty_records):
+            if self.caption_render_start <= index < self.caption_render_end:
+                line = self.caption_record_line(index) + 1
+                area.delete(f"{line}.0", f"{line}.end")
+                area.insert(f"{line}.0", self.caption_translation_display(self.caption_history.records[index]), ("translation_style",))
+        self.caption_dirty_records.clear()
+
+        new_end = len(self.caption_history)
+        if self.caption_window_at_tail and new_end > self.caption_render_end:
+            partial_range = area.tag_ranges("partial_line")
+            area.insert(partial_range[0] if partial_range else tk.END, *self.caption_insert_args(self.caption_render_end, new_end))
+            self.caption_render_end = new_end
+            if at_bottom:
+                self.trim_caption_window_top()
+
+        if at_bottom:
+            area.see(tk.END)
+        area.config(state=tk.DISABLED)
+
+    def trim_caption_window_top(self):
+        excess = self.caption_render_end - self.caption_render_start - CAPTION_RENDER_MAX_RECORDS
+        if excess > 0:
+            new_start = self.caption_render_start + excess
+            self.caption_display_area.delete("1.0", f"{self.caption_record_line(new_start)}.0")
+            self.caption_render_start = new_start
+
+    def trim_caption_window_bottom(self):
+        excess = self.caption_render_end - self.caption_render_start - CAPTION_RENDER_MAX_RECORDS
+        if excess > 0:
+            new_end = self.caption_render_end - excess
+            self.caption_display_area.delete(f"{self.caption_record_line(new_end)}.0", f"{self.caption_record_line(self.caption_render_end)}.0")
+            self.caption_render_end = new_end
+            self.caption_window_at_tail = False
+            self.clear_partial_caption()
+
+    def on_caption_scroll(self, first, last):
+        self.caption_display_area.vbar.set(first, last)
+        if self.caption_page_scheduled:
+            return
+        if float(first) <= 0.0 and self.caption_render_start > 0:
+            self.caption_page_scheduled = True
+            self.root.after_idle(self.page_in_older_captions)
+        elif float(last) >= 1.0 and self.caption_render_end < len(self.caption_history):
+            self.caption_page_scheduled = True
+            self.root.after_idle(self.page_in_newer_captions)
+
+    def page_in_older_captions(self):
+        self.caption_page_scheduled = False
+        area = self.caption_display_area
+        new_start = max(0, self.caption_render_start - CAPTION_PAGE_RECORDS)
+        area.config(state=tk.NORMAL)
+        area.insert("1.0", *self.caption_insert_args(new_start, self.caption_render_start))
+        old_start = self.caption_render_start
+        self.caption_render_start = new_start
+        self.trim_caption_window_bottom()
+        area.config(state=tk.DISABLED)
+        area.yview(f"{self.caption_record_line(old_start)}.0") # Keep the line the user was looking at in place
+
+    def page_in_newer_captions(self):
+        self.caption_page_scheduled = False
+        area = self.caption_display_area
+        old_end = self.caption_render_end
+        new_end = min(len(self.caption_history), old_end + CAPTION_PAGE_RECORDS)
+        area.config(state=tk.NORMAL)
+        partial_range = area.tag_ranges("partial_line")
+        area.insert(partial_range[0] if partial_range else tk.END, *self.caption_insert_args(old_end, new_end))
+        self.caption_render_end = new_end
+        self.caption_window_at_tail = new_end == len(self.caption_history)
+        self.trim_caption_window_top()
+        area.config(state=tk.DISABLED)
+        area.see(f"{self.caption_record_line(old_end)}.0")
+
+    def clear_partial_caption(self):
+        partial_range = self.caption_display_area.tag_ranges("partial_line")
+        if partial_range:
+            self.caption_display_area.delete(partial_range[0], partial_range[-1])
+
+    def update_partial_caption(self, stable_text, unstable_text, speaker_id):
+        """Redraws the in-progress streaming line: agreed words normally, unstable words greyed out."""
+        self.ensure_speaker(speaker_id)
+        self.caption_display_area.config(state=tk.NORMAL)
+        self.clear_partial_caption()
+        if (stable_text or unstable_text) and self.caption_window_at_tail:
+            speaker_nickname = self.speakers[speaker_id]['nickname']
+            self.caption_display_area.insert(tk.END, speaker_nickname + ": ", (f"speaker{speaker_id}_nick", "partial_line"))
+            if stable_text:
+                self.caption_display_area.insert(tk.END, stable_text + " ", ("partial_line",))
+            if unstable_text:
+                self.caption_display_area.insert(tk.END, unstable_text, ("partial_style", "partial_line"))
+            self.caption_display_area.see(tk.END)
         self.caption_display_area.config(state=tk.DISABLED)
 
-    def update_audio_visualizer(self):
-        """Periodically updates the audio level bar."""
-        # Scale current_audio_level (0.0 to ~50.0 or more) to 0-100 for progress bar
-        # This scaling factor (2) is arbitrary and might need adjustment based on typical input levels.
-        scaled_level = min(self.current_audio_level * 2, 100) 
-        self.audio_level_bar['value'] = scaled_level
-        self.root.after(50, self.update_audio_visualizer) # Update every 50ms
-
-
-    def audio_callback(self, indata, frames, time, status):
-        if status:
-            print("Audio callback status:", status, file=sys.stderr) 
-        self.audio_queue.put(indata.copy()) 
-        # Calculate RMS for volume visualization
-        volume_norm = np.linalg.norm(indata) * 10  # Multiplier to make it more visible
-        self.current_audio_level = volume_norm
+    def schedule_audio_visualizer(self):
+        """Starts the level meter updates if they should run and are not already scheduled."""
+        if self.level_meter_job is None and self.is_listening():
+            self.level_meter.reset()
+            self.level_meter_job = self.root.after(int(1000 / LEVEL_METER_RATE_HZ), self.update_audio_visualizer)
 
+    def on_window_shown(self, event):
+        if event.widget is self.root:
+            self.schedule_audio_visualizer()
 
-    def transcribe_loop_threaded(self):
-        sample_rate = 16000 
-        chunk_duration_s = 4 
-        buffer = np.empty((0, 1), dtype=np.float32) 
+    def update_audio_visualizer(self):
+        """Updates the audio level bar (and strip) at LEVEL_METER_RATE_HZ; stops when idle or minimized."""
+        self.level_meter_job = None
+        if not self.is_listening() or self.root.state() in ("iconic", "withdrawn"):
+            self.audio_level_bar['value'] = 0
+            self.draw_peak_marker(LEVEL_METER_FLOOR_DB)
+            self.draw_level_strip(None)
+            return
+        sources = [self.remote_client] if self.remote_client is not None else self.engine.audio_rings()
+        rms_db, peak_db, strip = self.level_meter.measure(sources)
+        self.audio_level_bar['value'] = float(LevelMeter.fraction(rms_db)) * 100
+        self.draw_peak_marker(peak_db)
+        self.draw_level_strip(strip)
+        self.level_meter_job = self.root.after(int(1000 / LEVEL_METER_RATE_HZ), self.update_audio_visualizer)
+
+    def draw_peak_marker(self, peak_db):
+        """Marks the held peak on the level bar; hidden while the peak is at the meter floor."""
+        fraction = float(LevelMeter.fraction(peak_db))
+        if fraction <= 0:
+            self.audio_peak_marker.place_forget()
+        else:
+            self.audio_peak_marker.place(in_=self.audio_level_bar, relx=fraction, rely=0, relheight=1, anchor="ne")
 
-        while self.is_listening:
-            try:
-                audio_data_chunk = self.audio_queue.get(timeout=0.1) 
-                buffer = np.concatenate((buffer, audio_data_chunk), axis=0)
-
-                if buffer.shape[0] >= sample_rate * chunk_duration_s:
-                    process_chunk = buffer[:sample_rate * chunk_duration_s]
-                    buffer = buffer[sample_rate * chunk_duration_s:] 
-                    audio_np = process_chunk[:, 0].astype(np.float32) 
-                    
-                    # Audio visualizer is now updated independently by update_audio_visualizer
-                    # No self.audio_level_bar.step() here.
-
-                    transcription_language = self.transcription_lang_cycle[self.current_lang_cycle_idx]
-                    effective_transcription_language = transcription_language
-                    if self.current_language_from_settings is not None and \
-                       self.current_language_from_settings not in self.transcription_lang_cycle:
-                        effective_transcription_language = self.current_language_from_settings
-                    elif self.current_language_from_settings is None: 
-                         effective_transcription_language = None
-
-                    segments, info = self.model.transcribe(audio_np, 
-                                                           beam_size=5, 
-                                                           language=effective_transcription_language, 
-                                                           vad_filter=True, 
-                                                           vad_parameters=dict(min_silence_duration_ms=500)
-                                                           )
-                    transcribed_text = "".join(segment.text + " " for segment in segments).strip()
-                    if transcribed_text: 
-                        self.root.after(0, self.add_caption_line, transcribed_text, self.active_speaker)
-            except queue.Empty:
-                continue 
-            except Exception as e:
-                error_message = f"Transcription error: {str(e)[:100]}" 
-                print(error_message, file=sys.stderr)
-                self.root.after(0, self.add_caption_line, f"[Error: {error_message}]", self.active_speaker)
-                break 
-        if self.stream and not self.stream.closed:
-            try:
-                self.stream.stop()
-                self.stream.close()
-            except Exception as e:
-                print(f"Error stopping audio stream in transcription loop: {e}", file=sys.stderr)
-        self.stream = None
-        print("Transcription loop has ended.")
-        self.root.after(0, self.update_button_state) 
+    def draw_level_strip(self, strip):
+        if self.level_meter.strip == "off":
+            return
+        height = int(self.level_strip["height"])
+        for i, bar in enumerate(self.level_strip_bars):
+            top = height - (strip[i] * height if strip is not None else 0)
+            self.level_strip.coords(bar, i * 4, top, i * 4 + 3, height)
+
+
+    def is_listening(self):
+        return self.engine.is_running or (self.remote_client is not None and self.remote_client.is_running)
+
+    def start_remote_transcription(self):
+        """Streams the selected device to the inference server; its events arrive like the engine's."""
+        for source in self.engine.sources: # A previous run's stream must not keep capturing
+            source.stop()
+        client = InferenceClient(self.server_path)
+        client.subscribe(self.engine_subscriber)
+        source = SoundDeviceSource(self.selected_device_id)
+        try:
+            client.start(self.faster_whisper_model_size, self.engine.settings(), source)
+        except Exception:
+            client.stop()
+            raise
+        self.remote_client = client
+        self.engine.sources = [source] # Closed with the window like local sources
 
     def toggle_transcription(self):
-        if self.is_listening:
-            self.is_listening = False 
+        if self.is_listening():
+            if self.remote_client is not None:
+                for source in self.engine.sources:
+                    source.stop()
+                self.remote_client.stop()
+            else:
+                self.engine.stop()
             print("Transcription stopping requested...")
         else:
+            if self.engine.model is None and not self.server_path:
+                messagebox.showinfo("Model Loading", f"The Whisper model '{self.engine.requested_model_size}' is still loading. Please try again in a moment.")
+                return
             if self.selected_device_id is None:
                 self.update_device_list() 
                 if not self.input_devices or self.selected_device_id is None:
                     messagebox.showerror("Audio Device Error", "No input audio device selected or available. Please check settings and ensure a microphone is connected.")
                     return
 
-            self.is_listening = True
-            display_lang = self.transcription_lang_cycle[self.current_lang_cycle_idx].upper()
-            if self.current_language_from_settings is not None and \
-               self.current_language_from_settings not in self.transcription_lang_cycle:
-                display_lang = f"{self.current_language_from_settings.upper()} (from settings)"
-            elif self.current_language_from_settings is None:
+            display_lang = self.engine.cycle_language().upper()
+            if self.engine.settings_language is not None and \
+               self.engine.settings_language not in self.engine.language_cycle:
+                display_lang = f"{self.engine.settings_language.upper()} (from settings)"
+            elif self.engine.settings_language is None:
                  display_lang = "Auto-Detect (from settings)"
 
             print(f"Starting transcription. Device ID: {self.selected_device_id}, Effective Language: {display_lang}")
             
             try:
-                while not self.audio_queue.empty(): self.audio_queue.get_nowait()
-
-                self.stream = sd.InputStream(
-                    device=self.selected_device_id, channels=1, samplerate=16000, 
-                    callback=self.audio_callback, dtype='float32' 
-                )
-                self.stream.start()
-                
-                self.transcription_thread = threading.Thread(target=self.transcribe_loop_threaded, daemon=True) 
-                self.transcription_thread.start()
+                self.transcript_log.new_run()
+                if self.server_path:
+                    self.start_remote_transcription()
+                else:
+                    self.engine.start(self.build_capture_sources())
             except Exception as e:
                 messagebox.showerror("Audio Stream Error", f"Failed to start audio stream: {e}")
-                self.is_listening = False 
-                if self.stream: 
-                    if not self.stream.closed: self.stream.close()
-                self.stream = None
         self.update_button_state() 
 
     def update_button_state(self):
-        if self.is_listening:
+        if self.is_listening():
             self.start_stop_button.config(text="⏹ Stop", bg=BTN_STOP_BG, fg=BTN_STOP_FG)
         else:
             self.start_stop_button.config(text="▶ Start", bg=BTN_START_BG, fg=BTN_START_FG)
-            # Don't reset audio_level_bar here, visualizer loop handles it or it shows last level
-            # self.audio_level_bar['value'] = 0 
+            # The visualizer resets the bar itself on its next tick.
+        self.schedule_audio_visualizer()
 
 
     def on_closing(self):
         print("Closing application...")
-        self.is_listening = False 
-        if self.transcription_thread and self.transcription_thread.is_alive():
+        self.engine.unsubscribe(self.engine_subscriber) # Tk is going away; stop posting events to it
+        self.engine.stop()
+        if self.remote_client is not None:
+            self.remote_client.stop()
+        self.engine.metrics.stop_export()
+        self.translation_pool.shutdown()
+        self.translation_cache.close()
+        self.transcript_log.close()
+        if self.engine.thread and self.engine.thread.is_alive():
             print("Waiting for transcription thread to finish...")
-            self.transcription_thread.join(timeout=2.0) 
-        if self.stream and not self.stream.closed:
+            self.engine.join(timeout=2.0) 
+        for source in self.engine.sources:
+            source.stop()
+            print("Audio stream closed on exit.")
+        self.root.destroy() 
+
+
+def split_at_silence(audio, sample_rate=AUDIO_SAMPLE_RATE, max_segment_s=BATCH_MAX_SEGMENT_S):
+    """Cuts a whole recording into speech segments with the same segmenter as live capture."""
+    segmenter = UtteranceSegmenter(sample_rate=sample_rate, max_utterance_s=max_segment_s)
+    return segmenter.feed(audio) + segmenter.flush()
+
+
+def format_timestamp(seconds, decimal_marker=","):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def write_captions(path, captions, output_format):
+    """Writes caption dicts (start, end, text and optional speaker/translation) as srt, vtt, txt or jsonl."""
+    with open(path, "w", encoding="utf-8") as f:
+        if output_format == "jsonl":
+            for caption in captions:
+                f.write(json.dumps(caption, ensure_ascii=False) + "\n")
+            return
+        if output_format == "vtt":
+            f.write("WEBVTT\n\n")
+        for i, caption in enumerate(captions, start=1):
+            text = caption["text"]
+            if caption.get("speaker"):
+                text = f"{caption['speaker']}: {text}"
+            if caption.get("translation"):
+                text += "\n" + caption["translation"]
+            if output_format == "txt":
+                f.write(text + "\n")
+            elif output_format == "srt":
+                f.write(f"{i}\n{format_timestamp(caption['start'])} --> {format_timestamp(caption['end'])}\n{text}\n\n")
+            else:
+                f.write(f"{format_timestamp(caption['start'], '.')} --> {format_timestamp(caption['end'], '.')}\n{text}\n\n")
+
+
+# Each batch worker process holds its own model, loaded once by the pool initializer.
+batch_worker_model = None
+batch_worker_options = None
+batch_worker_glossary = None
+
+
+def init_batch_worker(model_size, profile_name, cpu_threads, language, glossary_terms=()):
+    global batch_worker_model, batch_worker_options, batch_worker_glossary
+    model_options = dict(DECODE_MODEL_OPTIONS, cpu_threads=cpu_threads, num_workers=1)
+    batch_worker_model = WhisperModel(model_size, device="cpu", **model_options)
+    batch_worker_options = dict(DECODE_PROFILES[profile_name], language=language)
+    batch_worker_glossary = Glossary(glossary_terms) if glossary_terms else None
+    if batch_worker_glossary:
+        # Tokenized once per worker, not once per segment.
+        batch_worker_options["initial_prompt"] = PromptCache().prompt(batch_worker_model, batch_worker_glossary, ())
+
+
+def transcribe_batch_segment(audio, offset_s):
+    segments, info = batch_worker_model.transcribe(audio, vad_filter=True,
+                                                   vad_parameters=dict(min_silence_duration_ms=500),
+                                                   **batch_worker_options)
+    captions = []
+    for segment in segments:
+        text = segment.text.strip()
+        if batch_worker_glossary:
+            text = batch_worker_glossary.correct(text)[0]
+        if text:
+            captions.append((offset_s + segment.start, offset_s + segment.end, text))
+    return captions
+
+
+def translate_captions(captions, source_lang, target_lang, backend_kind=TRANSLATION_BACKEND):
+    """Fills in `translation` for every caption through the same worker pool and cache the app uses."""
+    done = threading.Event()
+    remaining = [len(captions)]
+    results = {}
+
+    def on_result(job_id, status, text):
+        results[job_id] = text if status == "ok" else "[Translation not available]"
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            done.set()
+
+    cache = TranslationCache()
+    pool = TranslationWorkerPool(make_translation_backend(backend_kind), on_result, max_backlog=len(captions) + 1, cache=cache)
+    job_ids = [pool.submit(caption["text"], 0, source_lang, target_lang) for caption in captions]
+    if captions:
+        done.wait()
+    pool.shutdown()
+    cache.close()
+    for caption, job_id in zip(captions, job_ids):
+        caption["translation"] = f"{target_lang.upper()}: {results[job_id]}"
+
+
+def run_batch_transcription(args):
+    paths = sorted({path for pattern in args.files for path in (glob.glob(pattern) or [pattern])})
+    if not paths:
+        print("No input files given.", file=sys.stderr)
+        return 1
+    workers = max(1, args.workers)
+    cpu_threads = max(1, args.threads // workers)
+    language = None if args.language == "auto" else args.language
+    glossary_terms = []
+    if args.glossary:
+        try:
+            glossary_terms = Glossary.load(args.glossary).terms
+        except OSError as e:
+            print(f"Could not read glossary {args.glossary}: {e}", file=sys.stderr)
+            return 1
+    print(f"Transcribing {len(paths)} file(s) with '{args.model}' ({args.profile}), {workers} worker(s) x {cpu_threads} thread(s)")
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker,
+                                                initargs=(args.model, args.profile, cpu_threads, language, glossary_terms)) as executor:
+        for path in paths:
+            start_time = time.perf_counter()
             try:
-                self.stream.stop()
-                self.stream.close()
-                print("Audio stream closed successfully on exit.")
+                audio = decode_audio(path, sampling_rate=AUDIO_SAMPLE_RATE)
             except Exception as e:
-                print(f"Error closing audio stream on exit: {e}", file=sys.stderr)
-        self.root.destroy() 
+                print(f"Could not decode {path}: {e}", file=sys.stderr)
+                continue
+            speech_ranges = split_at_silence(audio)
+            futures = [executor.submit(transcribe_batch_segment, audio[start:end], start / AUDIO_SAMPLE_RATE)
+                       for start, end in speech_ranges]
+            captions = [{"start": round(start_s, 3), "end": round(end_s, 3), "text": text}
+                        for future in futures for start_s, end_s, text in future.result()]
+            if args.translate_to:
+                translate_captions(captions, language or "auto", args.translate_to, args.translator)
+
+            out_dir = args.out_dir or os.path.dirname(path)
+            out_path = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + "." + args.out)
+            write_captions(out_path, captions, args.out)
+            elapsed = time.perf_counter() - start_time
+            audio_s = len(audio) / AUDIO_SAMPLE_RATE
+            print(f"{path}: {len(captions)} captions from {len(speech_ranges)} speech segments, "
+                  f"{audio_s:.0f}s audio in {elapsed:.1f}s (RTF {elapsed / max(audio_s, 1e-9):.3f}) -> {out_path}")
+    return 0
+
+
+def current_rss_mb():
+    """Resident set size of this process; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource # Unix only
+        except ImportError:
+            return 0.0 # Not measured on Windows
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10 # bytes on macOS, KiB elsewhere
+
+
+def percentiles_ms(values):
+    if not values:
+        return {"count": 0}
+    values = np.asarray(values) * 1000
+    return {"count": len(values), "mean": round(float(values.mean()), 1),
+            **{f"p{q}": round(float(np.percentile(values, q)), 1) for q in (50, 95, 99)}}
+
+
+def run_benchmark_case(engine, make_source, model_size, profile_name, streaming):
+    """Runs one configuration end to end and returns its measurements."""
+    engine.decode_profile_name = profile_name
+    engine.auto_tuner.set_ceiling(profile_name)
+    engine.streaming_mode = streaming
+    load_start = time.perf_counter()
+    engine.load_model(model_size)
+    load_s = time.perf_counter() - load_start
+
+    source = make_source()
+    latencies = []
+    queue_depth = []
+    peak_rss = [current_rss_mb()]
+    captions = [0]
+    done = threading.Event()
+    # Utterance captions end after the silence padding the segmenter keeps; streaming ones at the last word.
+    trailing_padding_s = 0.0 if streaming else VAD_PADDING_MS / 1000
+
+    def on_event(event):
+        if event.kind == "caption":
+            captions[0] += 1
+            if source.realtime and event.end_s is not None:
+                # Speech end on the capture clock vs. the moment the caption was emitted.
+                speech_end_s = max(event.start_s, event.end_s - trailing_padding_s)
+                latencies.append(time.perf_counter() - (source.start_time + speech_end_s))
+        elif event.kind == "stopped":
+            done.set()
+
+    def sample():
+        while not done.wait(BENCH_SAMPLE_INTERVAL_S):
+            queue_depth.append([round(time.perf_counter() - source.start_time, 2),
+                                round(engine.audio_stats()["lag_s"], 3)])
+            peak_rss[0] = max(peak_rss[0], current_rss_mb())
+
+    engine.subscribe(on_event)
+    cpu_start, wall_start = os.times(), time.perf_counter()
+    engine.start(source)
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    done.wait()
+    sampler.join()
+    cpu_end, wall_s = os.times(), time.perf_counter() - wall_start
+    engine.unsubscribe(on_event)
+
+    cpu_s = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    audio_s = len(source.samples) / source.sample_rate
+    snapshot = engine.metrics.snapshot()
+    counters = snapshot["counters"]
+    return {
+        "model": model_size,
+        "profile": profile_name,
+        "streaming": streaming,
+        "model_load_s": round(load_s, 3),
+        "startup": {name: round(seconds, 3) for name, seconds in snapshot["startup"].items()},
+        "audio_s": round(audio_s, 3),
+        "wall_s": round(wall_s, 3),
+        "rtf": round(counters.get("decode_s_total", 0.0) / audio_s, 4) if audio_s else None, # Decode time per second of input audio
+        "decode_calls": int(counters.get("decode_calls", 0)),
+        "decoded_audio_s": round(counters.get("decoded_audio_s_total", 0.0), 3),
+        "captions": captions[0],
+        "latency_ms": percentiles_ms(latencies),
+        "cpu": {"process_s": round(cpu_s, 3), "cores_used": round(cpu_s / wall_s, 3) if wall_s else None,
+                "utilisation_pct": round(100 * cpu_s / wall_s / (os.cpu_count() or 1), 1) if wall_s else None},
+        "peak_rss_mb": round(peak_rss[0], 1),
+        "audio_dropped_samples": engine.audio_stats()["dropped_samples"],
+        "queue_depth_s": queue_depth,
+    }
+
+
+def run_benchmark(args):
+    if args.audio:
+        audio = decode_audio(args.audio, sampling_rate=AUDIO_SAMPLE_RATE)
+        make_source = lambda: ArraySource(audio, realtime=not args.max_speed)
+    else:
+        make_source = lambda: SyntheticSource(args.synthetic, speech_intervals=[
+            (start, start + 3.0) for start in np.arange(1.0, args.synthetic - 3.0, 5.0)
+        ], realtime=not args.max_speed)
+
+    engine = CaptionEngine()
+    engine.set_settings_language(None if args.language == "auto" else args.language)
+    runs = []
+    for model_size in args.models.split(","):
+        for profile_name in args.profiles.split(","):
+            for streaming in ([False, True] if args.streaming == "both" else [args.streaming == "on"]):
+                print(f"Benchmarking model={model_size} profile={profile_name} streaming={streaming}...")
+                result = run_benchmark_case(engine, make_source, model_size, profile_name, streaming)
+                print(f"  RTF {result['rtf']}, latency {result['latency_ms']}, peak RSS {result['peak_rss_mb']} MB")
+                runs.append(result)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "audio": args.audio or f"synthetic:{args.synthetic}s",
+            "realtime": not args.max_speed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "runs": runs,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+    return 0
+
+
+def run_server(args):
+    server = InferenceServer(args.socket, slots=args.slots)
+    for model_size in filter(None, args.preload.split(",")):
+        print(f"Preloading '{model_size}'...")
+        server.model_registry.load(model_size, device="cpu", **DECODE_MODEL_OPTIONS)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Inference server stopped.")
+    return 0
+
+
+def run_export(args):
+    captions = read_transcript(args.transcript)
+    output_path = args.output or os.path.splitext(args.transcript)[0] + "." + args.out
+    write_captions(output_path, captions, args.out)
+    print(f"{len(captions)} captions -> {output_path}")
+    return 0
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Lively Captions: live captioning app and offline tools.")
+    parser.add_argument("--server", nargs="?", const=INFERENCE_SOCKET_PATH,
+                        help="Caption through a running inference server (optionally its socket path).")
+    parser.add_argument("--glossary", help="Glossary file (one term per line) for this session.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the shared inference server for caption clients.")
+    serve_parser.add_argument("--socket", default=INFERENCE_SOCKET_PATH, help="Unix socket path (default: %(default)s).")
+    serve_parser.add_argument("--preload", default="", help="Comma-separated model sizes to load at startup.")
+    serve_parser.add_argument("--slots", type=int, default=INFERENCE_SERVER_SLOTS, help="Concurrent decodes (default: %(default)s).")
+
+    transcribe_parser = subparsers.add_parser("transcribe", help="Transcribe audio files without the GUI.")
+    transcribe_parser.add_argument("files", nargs="+", help="Audio files or glob patterns (WAV, FLAC, ...).")
+    transcribe_parser.add_argument("--out", choices=BATCH_OUTPUT_FORMATS, default="srt", help="Output format (default: srt).")
+    transcribe_parser.add_argument("--out-dir", help="Directory for output files (default: next to each input).")
+    transcribe_parser.add_argument("--model", default="base", help="Whisper model size (default: base).")
+    transcribe_parser.add_argument("--profile", choices=DECODE_PROFILE_ORDER, default=DEFAULT_DECODE_PROFILE, help="Decode profile.")
+    transcribe_parser.add_argument("--language", default="auto", help="Language code, or 'auto' to detect (default: auto).")
+    transcribe_parser.add_argument("--glossary", help="Glossary file (one term per line) of names and jargon to get right.")
+    transcribe_parser.add_argument("--translate-to", help="Also translate captions into this language code.")
+    transcribe_parser.add_argument("--translator", choices=["auto", "online", "offline"], default=TRANSLATION_BACKEND, help="Translation backend (default: %(default)s).")
+    transcribe_parser.add_argument("--threads", type=int, default=os.cpu_count() or 4, help="Total CPU thread budget shared by all workers.")
+    transcribe_parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 4) // 4), help="Worker processes, each with its own model.")
+
+    export_parser = subparsers.add_parser("export", help="Convert a saved transcript log to subtitles or text.")
+    export_parser.add_argument("transcript", help="Transcript log (.jsonl) written by the app.")
+    export_parser.add_argument("--out", choices=BATCH_OUTPUT_FORMATS, default="srt", help="Output format (default: srt).")
+    export_parser.add_argument("--output", help="Output path (default: next to the transcript).")
+
+    bench_parser = subparsers.add_parser("bench", help="Measure latency, RTF, CPU and memory of the live pipeline.")
+    bench_input = bench_parser.add_mutually_exclusive_group()
+    bench_input.add_argument("--audio", help="Recorded audio file to replay through the engine.")
+    bench_input.add_argument("--synthetic", type=float, default=60.0, help="Seconds of synthetic speech-like audio (default: 60).")
+    bench_parser.add_argument("--models", default="base", help="Comma-separated model sizes (default: base).")
+    bench_parser.add_argument("--profiles", default=DEFAULT_DECODE_PROFILE, help="Comma-separated decode profiles.")
+    bench_parser.add_argument("--streaming", choices=["off", "on", "both"], default="off", help="Streaming mode runs.")
+    bench_parser.add_argument("--language", default="en", help="Language code, or 'auto' to detect (default: en).")
+    bench_parser.add_argument("--max-speed", action="store_true", help="Replay as fast as possible (RTF only, no latency).")
+    bench_parser.add_argument("--out", default="bench_results.json", help="JSON report path.")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "transcribe":
+        return run_batch_transcription(args)
+    if args.command == "bench":
+        return run_benchmark(args)
+    if args.command == "export":
+        return run_export(args)
+    if args.command == "serve":
+        return run_server(args)
 
-if __name__ == "__main__":
     main_root = tk.Tk()
-    app = LiveTranscriberApp(main_root)
+    app = LiveTranscriberApp(main_root, server_path=args.server, glossary_path=args.glossary)
     main_root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def common_words(monkeypatch):
+    """Stands in for wordfreq with a fixed list of everyday words."""
+    words = {"call", "stack", "black", "and", "white", "the", "clause", "sigma", "vortex", "cut", "me", "some",
+             "slack", "open", "ai", "ask", "then", "on", "we", "deployed", "it", "today", "build", "said"}
+    monkeypatch.setattr(main, "zipf_frequency", lambda word, lang: 5.0 if word in words else 0.0)
+
+
+def test_compact_ignores_case_spaces_and_punctuation():
+    assert main.Glossary.compact("Open AI,") == "openai"
+
+
+def test_load_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / "terms.txt"
+    path.write_text("Kubernetes # the orchestrator\n\n# just a comment\nOpenAI\nKubernetes\n", encoding="utf-8")
+    assert main.Glossary.load(str(path)).terms == ["Kubernetes", "OpenAI"]
+
+
+def test_lookup_exact_and_near_miss():
+    glossary = main.Glossary(["Kubernetes", "Lively Captions"])
+    assert glossary.lookup("kubernetes", 1) == "Kubernetes"
+    assert glossary.lookup("kubernets", 1) == "Kubernetes"
+    assert glossary.lookup("livelycaptins", 2) == "Lively Captions"
+
+
+def test_lookup_near_miss_must_span_the_terms_word_count():
+    glossary = main.Glossary(["Lively Captions"])
+    assert glossary.lookup("livelycaptins", 1) is None
+
+
+def test_lookup_short_terms_take_no_near_misses():
+    glossary = main.Glossary(["Slack", "Figma", "Vertex", "Claude"])
+    assert glossary.lookup("stack", 1) is None
+    assert glossary.lookup("sigma", 1) is None
+    assert glossary.lookup("vortex", 1) is None
+    assert glossary.lookup("clause", 1) is None
+
+
+def test_lookup_without_fuzzy_only_matches_exactly():
+    glossary = main.Glossary(["Kubernetes"])
+    assert glossary.lookup("kubernets", 1, fuzzy=False) is None
+    assert glossary.lookup("kubernetes", 1, fuzzy=False) == "Kubernetes"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("we deployed it on kubernets today.", "we deployed it on Kubernetes today."),
+    ("Open AI released it", "OpenAI released it"),
+    ("Thanks, Lively Captins!", "Thanks, Lively Captions!"),
+    ("ask zslyv about grpc", "ask Zslyv about gRPC"),
+    ("the cat sat", "the cat sat"),
+])
+def test_correct_fixes_near_misses_and_keeps_surrounding_text(text, expected):
+    glossary = main.Glossary(["Kubernetes", "OpenAI", "Lively Captions", "Zslyv", "gRPC"])
+    assert glossary.correct(text)[0] == expected
+
+
+@pytest.mark.parametrize("text", ["call stack", "black and white", "the clause", "sigma", "vortex"])
+def test_correct_leaves_everyday_words_alone(text):
+    glossary = main.Glossary(["Slack", "Claude", "Figma", "Vertex", "Jenkins"])
+    assert glossary.correct(text) == (text, 0)
+
+
+def test_correct_keeps_possessive_and_trailing_punctuation():
+    glossary = main.Glossary(["Jenkins", "Kubernetes"])
+    assert glossary.correct("Jenkin's build") == ("Jenkins's build", 1)
+    assert glossary.correct("kubernetes's pods, ok?") == ("Kubernetes's pods, ok?", 1)
+
+
+def test_correct_skips_case_only_fixes_of_common_words(common_words):
+    glossary = main.Glossary(["Slack", "Figma", "OpenAI", "Kubernetes"])
+    assert glossary.correct("cut me some slack") == ("cut me some slack", 0)
+    assert glossary.correct("open ai and kubernetes") == ("OpenAI and Kubernetes", 2)
+
+
+def test_correct_with_empty_glossary_is_a_no_op():
+    assert main.Glossary(["  "]).correct("anything at all") == ("anything at all", 0)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+import main
+
+
+class ConstantSource:
+    def __init__(self, n, value=0.5):
+        self.samples = np.full(n, value, dtype=np.float32)
+
+    def latest(self, n):
+        return self.samples[-n:]
+
+
+@pytest.mark.parametrize("n", [1, main.LEVEL_STRIP_POINTS - 1, main.LEVEL_STRIP_POINTS + 1, 20000])
+def test_waveform_strip_handles_any_amount_of_audio(n):
+    meter = main.LevelMeter(strip="waveform")
+    rms_db, peak_db, strip = meter.measure([ConstantSource(n)])
+    assert strip.shape == (main.LEVEL_STRIP_POINTS,)
+    assert strip[-1] == pytest.approx(main.LevelMeter.fraction(rms_db))
+    assert peak_db == pytest.approx(20 * np.log10(0.5), abs=1e-3)
+
+
+def test_peak_hold_decays_towards_the_current_level(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: clock[0])
+    meter = main.LevelMeter()
+    meter.measure([ConstantSource(4000, 1.0)])
+    clock[0] += 1.0
+    _, peak_db, _ = meter.measure([ConstantSource(4000, 0.001)])
+    assert peak_db == pytest.approx(-main.LEVEL_METER_PEAK_DECAY_DB_S, abs=1e-3)
+
+
+def test_no_audio_reads_as_the_floor():
+    assert main.LevelMeter().measure([ConstantSource(0)]) == (main.LEVEL_METER_FLOOR_DB, main.LEVEL_METER_FLOOR_DB, None)